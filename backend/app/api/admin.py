@@ -25,9 +25,16 @@ async def get_admin_status(request: Request):
     return {
         "obs": obs_service.get_status(),
         "files": {
-            "total": len(file_service.get_all_files()),
-            "newest": file_service.get_newest_file()
+            **file_service.get_status(),
+            "total": len(file_service.catalog),
+            "newest": file_service.catalog.newest()
         },
+        "media_cache": file_service.media_cache.get_stats(),
+        "decoder_pool": file_service.decoder_pool.get_stats(),
+        "frame_cache": file_service.frame_cache.get_stats(),
+        "export_queue": request.app.state.export_queue.get_status(),
+        "export_cache": file_service.export_cache.get_stats(),
+        "preview": request.app.state.preview_broadcaster.get_status(),
         "audio_monitor": audio_monitor.get_status()
     }
 
@@ -39,9 +46,9 @@ async def set_mute_state(mute_request: MuteRequest, request: Request):
 
     try:
         if mute_request.muted:
-            obs_service.mute_video()
+            await obs_service.mute_video()
         else:
-            obs_service.unmute_video()
+            await obs_service.unmute_video()
 
         return {"success": True, "muted": mute_request.muted}
     except Exception as e:
@@ -54,7 +61,7 @@ async def reload_camera(request: Request):
     obs_service = request.app.state.obs_service
 
     try:
-        obs_service.reload_camera()
+        await obs_service.reload_camera()
         return {"success": True, "message": "Camera reloaded"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -66,7 +73,7 @@ async def set_logo_visibility(logo_request: LogoRequest, request: Request):
     obs_service = request.app.state.obs_service
 
     try:
-        obs_service.set_logo(logo_request.visible)
+        await obs_service.set_logo(logo_request.visible)
         return {"success": True, "visible": logo_request.visible}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
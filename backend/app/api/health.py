@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from datetime import datetime, timezone
 
@@ -11,6 +12,7 @@ class HealthResponse(BaseModel):
     timestamp: datetime
     obs_connected: bool
     recording: bool
+    archive_ready: bool
     version: str
 
 
@@ -18,16 +20,40 @@ class HealthResponse(BaseModel):
 async def health_check(request: Request):
     """Health check endpoint"""
     obs_service = request.app.state.obs_service
-    
+    file_service = request.app.state.file_service
+
     return HealthResponse(
         status="healthy" if obs_service.connected else "degraded",
         timestamp=datetime.now(timezone.utc),
         obs_connected=obs_service.connected,
         recording=obs_service.recording,
+        archive_ready=file_service.is_ready,
         version="2.0.0"
     )
 
 
+@router.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive", "timestamp": datetime.now(timezone.utc).isoformat()}
+
+
+@router.get("/health/ready")
+async def readiness(request: Request):
+    """Readiness probe: the recording archive has been loaded"""
+    file_service = request.app.state.file_service
+    catalog = file_service.get_status()
+
+    if not catalog["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "catalog": catalog},
+            headers={"Retry-After": "2"}
+        )
+
+    return {"status": "ready", "catalog": catalog}
+
+
 @router.get("/ping")
 async def ping():
     """Simple ping endpoint"""
@@ -1,12 +1,41 @@
-from fastapi import APIRouter, HTTPException, Request, Depends
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Request, Depends, Query, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import AsyncIterator, Literal, Optional, List, get_args
 from datetime import time
+import asyncio
+import hashlib
+import json
 import os
+import secrets
 
 from app.models.video import VideoFile
+from app.services.file_service import SeekMode
+from app.services.frame_pipeline import FrameSpec, FrameFormat, DEFAULT_FRAME_SPEC
+from app.services.subclip import ExportMode
+from app.services.export_queue import ExportSubscription
 
 router = APIRouter()
 
+# Upper bound for /videos/{id}/frames
+MAX_BATCH_FRAMES = 200
+
+EXPORT_MODES = get_args(ExportMode)
+
+# Comment lines sent on idle event streams so proxies keep the connection open
+SSE_KEEPALIVE_INTERVAL = 15.0
+EXPORT_FINAL_EVENTS = ("finished", "failed", "cancelled")
+
+
+def require_archive_ready(request: Request):
+    """Reject archive requests while the recording catalog is still loading"""
+    if not request.app.state.file_service.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Recording archive is warming up, please retry shortly",
+            headers={"Retry-After": "2"}
+        )
+
 
 @router.get("/status")
 async def get_recording_status(request: Request):
@@ -52,10 +81,34 @@ async def stop_recording(request: Request):
 
 
 @router.get("/current")
-async def get_current_recording(request: Request) -> Optional[VideoFile]:
-    """Get currently recording file"""
+async def get_current_recording(request: Request) -> Optional[dict]:
+    """Get currently recording file with live duration and size from OBS"""
+    obs_service = request.app.state.obs_service
+    if obs_service.current_file is None:
+        return None
+
+    live = await obs_service.fetch_live_counters()
+    return {
+        **obs_service.current_file.model_dump(mode="json"),
+        "duration": live["duration"] if live else None,
+        "size": live["bytes"] if live else None
+    }
+
+
+async def _get_live_counters(request: Request, video: VideoFile, with_size: bool = False) -> Optional[dict]:
+    """
+    Live OBS counters if the video is the recording currently being written
+
+    The duration is always current; with_size also fetches the byte count
+    from OBS, which is otherwise only as recent as the last status sample.
+    """
     obs_service = request.app.state.obs_service
-    return obs_service.current_file
+    live = obs_service.get_live_counters()
+    if live and live["filename"] == video.filename:
+        if with_size:
+            live = await obs_service.fetch_live_counters() or live
+        return live
+    return None
 
 
 @router.get("/preview")
@@ -74,25 +127,75 @@ async def get_preview_image(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.websocket("/preview/ws")
+async def preview_websocket(websocket: WebSocket):
+    """Live preview as binary WebSocket messages, one JPEG per message"""
+    broadcaster = websocket.app.state.preview_broadcaster
+    await websocket.accept()
+    subscription = broadcaster.subscribe()
+
+    async def send_frames():
+        # A slow client blocks here; meanwhile only the newest frame is kept
+        while (frame := await subscription.get()) is not None:
+            await websocket.send_bytes(frame.data)
+        await websocket.close()
+
+    sender = asyncio.create_task(send_frames())
+    try:
+        # Nothing is expected from the client; this returns when it disconnects
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        broadcaster.unsubscribe(subscription)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+
+@router.get("/preview.mjpg")
+async def get_preview_stream(request: Request):
+    """Live preview as an MJPEG stream (multipart/x-mixed-replace), usable directly in <img>"""
+    broadcaster = request.app.state.preview_broadcaster
+    subscription = broadcaster.subscribe()
+    boundary = secrets.token_hex(16)
+
+    async def frames() -> AsyncIterator[bytes]:
+        try:
+            while (frame := await subscription.get()) is not None:
+                yield (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(frame.data)}\r\n\r\n"
+                ).encode() + frame.data + b"\r\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        frames(),
+        media_type=f"multipart/x-mixed-replace; boundary={boundary}",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # Video Management Endpoints
-@router.get("/videos")
+@router.get("/videos", dependencies=[Depends(require_archive_ready)])
 async def get_all_videos(request: Request) -> List[dict]:
     """Get all recorded videos"""
     file_service = request.app.state.file_service
-    videos = file_service.get_all_files()
 
     # Convert to dict format with additional info
     video_list = []
-    for video in videos:
+    # Snapshot: the catalog may change while stats are awaited below
+    for video in file_service.get_all_files():
         # Calculate actual video file duration if end_time is null (currently recording)
         duration = None
         if video.duration:
             duration = video.duration.total_seconds()
+        elif live := await _get_live_counters(request, video):
+            # Active recording: OBS knows the duration, no need to touch the file
+            duration = live["duration"]
         else:
-            # Get actual duration from video file
-            actual_duration = await file_service.calculate_video_duration(video.filename)
-            if actual_duration:
-                duration = actual_duration
+            # Get actual duration from video file (cached until the file changes)
+            _, duration = await file_service.get_video_stats(video.filename)
 
         video_dict = {
             "id": video.filename,
@@ -107,28 +210,34 @@ async def get_all_videos(request: Request) -> List[dict]:
     return video_list
 
 
-@router.get("/videos/{video_id}")
+@router.get("/videos/{video_id}", dependencies=[Depends(require_archive_ready)])
 async def get_video_by_id(video_id: str, request: Request) -> dict:
     """Get video details by ID (filename)"""
     file_service = request.app.state.file_service
-    video = file_service.get_file(video_id)
+    video = file_service.catalog.get(video_id)
 
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
 
-    # Get file size
-    video_path = file_service.get_video_path(video_id)
-    file_size = file_service.get_filesize(video_path) if os.path.exists(video_path) else 0
-
-    # Calculate actual video file duration if end_time is null (currently recording)
-    duration = None
-    if video.duration:
-        duration = video.duration.total_seconds()
+    live = await _get_live_counters(request, video, with_size=True)
+    if live:
+        # Active recording: take size and duration from OBS without file I/O
+        file_size = live["bytes"]
+        duration = live["duration"]
     else:
-        # Get actual duration from video file
-        actual_duration = await file_service.calculate_video_duration(video_id)
-        if actual_duration:
-            duration = actual_duration
+        # Get file size and actual duration (cached until the file changes)
+        file_size, probed_duration = await file_service.get_video_stats(video_id)
+
+        # Prefer the recorded time span; fall back to the file (unfinished recording)
+        duration = video.duration.total_seconds() if video.duration else probed_duration
+
+    sprite = None
+    if file_service.has_sprite_sheet(video_id):
+        # Served statically next to the recording
+        sprite = f"/videos/{video.filename}.sprite.json"
+    elif not video.is_recording:
+        # Recordings from before sprite sheets existed: generate on first access
+        file_service.schedule_sprite_sheet(video_id)
 
     return {
         "id": video.filename,
@@ -137,13 +246,24 @@ async def get_video_by_id(video_id: str, request: Request) -> dict:
         "end_time": video.end_time.isoformat() if video.end_time else None,
         "duration": duration,
         "is_recording": video.is_recording,
-        "size": file_size
+        "size": file_size,
+        "sprite": sprite
     }
 
 
-@router.get("/videos/{video_id}/frame")
-async def get_video_frame(video_id: str, timestamp: float, request: Request):
-    """Get a frame from a video at a specific timestamp (in seconds)"""
+@router.get("/videos/{video_id}/frame", dependencies=[Depends(require_archive_ready)])
+async def get_video_frame(
+    video_id: str,
+    timestamp: float,
+    request: Request,
+    seek: SeekMode = "exact"
+):
+    """
+    Get a frame from a video at a specific timestamp (in seconds)
+
+    seek=keyframe returns the nearest preceding keyframe (fast scrubbing),
+    seek=exact decodes the frame at the timestamp.
+    """
     file_service = request.app.state.file_service
     video = file_service.get_file(video_id)
 
@@ -156,7 +276,7 @@ async def get_video_frame(video_id: str, timestamp: float, request: Request):
         timestamp_datetime = video.start_time + timedelta(seconds=timestamp)
         timestamp_time = timestamp_datetime.time()
 
-        frame_base64 = await file_service.get_frame_at_time(video_id, timestamp_time)
+        frame_base64 = await file_service.get_frame_at_time(video_id, timestamp_time, seek)
 
         if frame_base64:
             return {
@@ -171,56 +291,322 @@ async def get_video_frame(video_id: str, timestamp: float, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/videos/{video_id}/export")
+def frame_spec(
+    width: int = Query(DEFAULT_FRAME_SPEC.width, ge=16, le=3840),
+    height: int = Query(DEFAULT_FRAME_SPEC.height, ge=16, le=2160),
+    quality: int = Query(DEFAULT_FRAME_SPEC.quality, ge=1, le=100),
+    format: FrameFormat = DEFAULT_FRAME_SPEC.format
+) -> FrameSpec:
+    """Output parameters of frame endpoints (frames are fitted into width x height)"""
+    return FrameSpec(width, height, quality, format)
+
+
+def _frame_etag(video_id: str, seconds: float, spec: FrameSpec) -> str:
+    """Strong ETag of a rendered frame"""
+    key = f"{video_id}|{seconds:.3f}|{spec.width}x{spec.height}|q{spec.quality}|{spec.format}"
+    return '"{}"'.format(hashlib.sha1(key.encode()).hexdigest()[:24])
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/videos/{video_id}/frame.{extension}", dependencies=[Depends(require_archive_ready)])
+async def get_video_frame_image(
+    video_id: str,
+    extension: Literal["jpg", "webp"],
+    request: Request,
+    timestamp: float = Query(..., ge=0),
+    seek: SeekMode = "exact",
+    spec: FrameSpec = Depends(frame_spec)
+):
+    """
+    Get a frame as image/jpeg (frame.jpg) or image/webp (frame.webp)
+
+    The frame keeps its aspect ratio and is fitted into width x height
+    (never upscaled). The timestamp (seconds) is quantized (or snapped to the keyframe with
+    seek=keyframe); responses carry a strong ETag, and frames of finished
+    recordings are marked immutable so browsers and the nginx proxy can
+    answer repeated scrub positions themselves.
+    """
+    file_service = request.app.state.file_service
+    video = file_service.get_file(video_id)
+
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    spec = spec._replace(format="webp" if extension == "webp" else "jpeg")
+    seconds = await file_service.resolve_frame_time(video_id, timestamp, seek)
+    etag = _frame_etag(video_id, seconds, spec)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache" if video.is_recording else "public, max-age=31536000, immutable",
+        "X-Frame-Timestamp": f"{seconds:.3f}"
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    image = await file_service.get_frame_image(video_id, seconds, spec)
+    if image is None:
+        raise HTTPException(status_code=500, detail="Could not extract frame")
+
+    return Response(content=image, media_type=spec.media_type, headers=headers)
+
+
+@router.get("/videos/{video_id}/frames", dependencies=[Depends(require_archive_ready)])
+async def get_video_frames(
+    video_id: str,
+    request: Request,
+    timestamps: Optional[List[float]] = Query(None),
+    start: Optional[float] = Query(None, ge=0),
+    stop: Optional[float] = Query(None, ge=0),
+    step: Optional[float] = Query(None, gt=0),
+    spec: FrameSpec = Depends(frame_spec)
+):
+    """
+    Get many frames in one request as multipart/mixed
+
+    Takes either repeated `timestamps` or a `start`/`stop`/`step` range (in
+    seconds). The frames are decoded in ascending order in one pass over the
+    video; every part is an image (see width/height/quality/format) with an
+    X-Frame-Timestamp header.
+    """
+    file_service = request.app.state.file_service
+    video = file_service.get_file(video_id)
+
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    if timestamps is None:
+        if start is None or stop is None or step is None:
+            raise HTTPException(status_code=400, detail="Provide timestamps or start, stop and step")
+        if stop < start:
+            raise HTTPException(status_code=400, detail="stop must not be before start")
+        count = int((stop - start) / step) + 1
+        if count > MAX_BATCH_FRAMES:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FRAMES} frames per request")
+        timestamps = [start + i * step for i in range(count)]
+
+    if len(timestamps) > MAX_BATCH_FRAMES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FRAMES} frames per request")
+
+    boundary = secrets.token_hex(16)
+
+    async def parts():
+        async for seconds, image in file_service.iter_frames(video_id, timestamps, spec):
+            yield (
+                f"--{boundary}\r\n"
+                f"Content-Type: {spec.media_type}\r\n"
+                f"Content-Length: {len(image)}\r\n"
+                f"X-Frame-Timestamp: {seconds:.3f}\r\n\r\n"
+            ).encode() + image + b"\r\n"
+        yield f"--{boundary}--\r\n".encode()
+
+    return StreamingResponse(parts(), media_type=f"multipart/mixed; boundary={boundary}")
+
+
+@router.post("/videos/{video_id}/export", status_code=202, dependencies=[Depends(require_archive_ready)])
 async def export_video_subclip(video_id: str, request: Request):
-    """Export a subclip from a video"""
+    """Queue a subclip export; poll /exports/{job_id} for progress and the result"""
     file_service = request.app.state.file_service
+    export_queue = request.app.state.export_queue
     video = file_service.get_file(video_id)
 
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
 
-    try:
-        # Parse request body
-        body = await request.json()
-        start_time_seconds = body.get("start_time", 0)
-        end_time_seconds = body.get("end_time")
+    # Parse request body
+    body = await request.json()
+    start_time_seconds = body.get("start_time", 0)
+    end_time_seconds = body.get("end_time")
+    mode = body.get("mode", "fast")
 
-        if end_time_seconds is None:
-            raise HTTPException(status_code=400, detail="end_time is required")
+    if end_time_seconds is None:
+        raise HTTPException(status_code=400, detail="end_time is required")
 
-        # Convert seconds to time objects
-        from datetime import timedelta
-        start_datetime = video.start_time + timedelta(seconds=start_time_seconds)
-        end_datetime = video.start_time + timedelta(seconds=end_time_seconds)
+    if mode not in EXPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(EXPORT_MODES)}")
 
-        start_time = start_datetime.time()
-        end_time = end_datetime.time()
+    try:
+        start_time_seconds = float(start_time_seconds)
+        end_time_seconds = float(end_time_seconds)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="start_time and end_time must be numbers")
+
+    if start_time_seconds < 0 or end_time_seconds <= start_time_seconds:
+        raise HTTPException(status_code=400, detail="Invalid time range")
+
+    job = export_queue.submit(video_id, start_time_seconds, end_time_seconds, mode)
+    return {"success": True, "job": export_queue.describe(job)}
+
+
+@router.get("/videos/{video_id}/export.mp4", dependencies=[Depends(require_archive_ready)])
+async def stream_video_subclip(
+    video_id: str,
+    request: Request,
+    start_time: float = Query(..., ge=0, description="Start in seconds from the recording start"),
+    end_time: float = Query(..., gt=0, description="End in seconds from the recording start"),
+    mode: Literal["fast", "exact"] = Query("fast")
+):
+    """
+    Download a subclip directly as fragmented MP4
+
+    ffmpeg writes into the response (nothing is stored on disk) and is
+    stopped when the client disconnects. Uses one of the EXPORT_CONCURRENCY
+    slots: 429 if all are busy, 503 while exports pause for a recording.
+    """
+    file_service = request.app.state.file_service
+    video = file_service.get_file(video_id)
+
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
 
-        # Export subclip
-        output_path = await file_service.export_subclip(video_id, start_time, end_time)
+    if end_time <= start_time:
+        raise HTTPException(status_code=400, detail="Invalid time range")
+
+    # Streamed exports share the queue's ffmpeg slots and pause rule
+    export_queue = request.app.state.export_queue
+    if export_queue.paused:
+        raise HTTPException(
+            status_code=503,
+            detail="Exports are paused while recording",
+            headers={"Retry-After": "60"}
+        )
+    release_slot = await export_queue.reserve_slot()
+    if release_slot is None:
+        raise HTTPException(
+            status_code=429,
+            detail="All export slots are busy, please retry shortly or queue the export",
+            headers={"Retry-After": "5"}
+        )
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in file_service.stream_subclip(
+                video_id, start_time, end_time, mode, nice=export_queue.nice
+            ):
+                yield chunk
+        finally:
+            release_slot()
+
+    filename = file_service.export_filename(video, start_time, end_time, mode)
+    return StreamingResponse(
+        body(),
+        media_type="video/mp4",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no"
+        },
+        # Also frees the slot if the client left before the stream started
+        background=BackgroundTask(release_slot)
+    )
+
+
+@router.get("/exports")
+async def list_export_jobs(request: Request) -> List[dict]:
+    """Queued, running and recently finished exports"""
+    return request.app.state.export_queue.list_jobs()
+
+
+def _sse_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def _job_event(export_queue, job) -> bytes:
+    """Current state of a job as the event that led to it"""
+    return _sse_event("progress" if job.state == "running" else job.state, export_queue.describe(job))
+
+
+def _event_stream(
+    export_queue,
+    subscription: Optional[ExportSubscription],
+    initial: List[bytes],
+    until_final: bool
+) -> StreamingResponse:
+    """Stream the initial events, then the subscription's (none without one)"""
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            for event in initial:
+                yield event
+            while subscription:
+                try:
+                    event, data = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield _sse_event(event, data)
+                if until_final and event in EXPORT_FINAL_EVENTS:
+                    return
+        finally:
+            if subscription:
+                export_queue.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/exports/events")
+async def stream_export_events(request: Request):
+    """Server-Sent Events of all export jobs, starting with the unfinished ones"""
+    export_queue = request.app.state.export_queue
+    subscription = export_queue.subscribe()
+
+    initial = [_job_event(export_queue, job) for job in export_queue.unfinished_jobs()]
+    return _event_stream(export_queue, subscription, initial, until_final=False)
+
+
+@router.get("/exports/{job_id}/events")
+async def stream_export_job_events(job_id: str, request: Request):
+    """Server-Sent Events of one export job; the stream ends with its final event"""
+    export_queue = request.app.state.export_queue
+    job = export_queue.get(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+
+    # A finished job only gets its final event
+    subscription = export_queue.subscribe(job_id) if not job.done else None
+    return _event_stream(
+        export_queue, subscription, [_job_event(export_queue, job)], until_final=True
+    )
+
+
+@router.get("/exports/{job_id}")
+async def get_export_job(job_id: str, request: Request) -> dict:
+    """State, queue position, progress and (when finished) the file of an export"""
+    export_queue = request.app.state.export_queue
+    job = export_queue.get(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+
+    return export_queue.describe(job)
+
+
+@router.delete("/exports/{job_id}")
+async def cancel_export_job(job_id: str, request: Request):
+    """Cancel a queued or running export"""
+    export_queue = request.app.state.export_queue
 
-        if output_path:
-            # Get filename and file size
-            output_filename = os.path.basename(output_path)
-            file_size = file_service.get_filesize(output_path)
+    if not export_queue.get(job_id):
+        raise HTTPException(status_code=404, detail="Export job not found")
 
-            return {
-                "success": True,
-                "file": {
-                    "filename": output_filename,
-                    "size": file_size,
-                    "url": f"/videos/{output_filename}"
-                }
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Export failed")
+    if not export_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Export job already finished")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {"success": True, "message": f"Export {job_id} cancelled"}
 
 
-@router.delete("/videos/{video_id}")
+@router.delete("/videos/{video_id}", dependencies=[Depends(require_archive_ready)])
 async def delete_video(video_id: str, request: Request):
     """Delete a video file"""
     file_service = request.app.state.file_service
@@ -70,8 +70,7 @@ async def update_settings(
         app_settings.SHOW_LOGO = settings_update.show_logo
         # Update OBS logo visibility
         obs_service = request.app.state.obs_service
-        import asyncio
-        await asyncio.to_thread(obs_service.set_logo, settings_update.show_logo)
+        await obs_service.set_logo(settings_update.show_logo)
 
     return {
         "success": True,
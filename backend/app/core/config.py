@@ -36,12 +36,43 @@ class Settings(BaseSettings):
     VIDEO_DIRECTORY: str = "videos"
     ASSETS_DIRECTORY: str = "assets"
     LOGS_DIRECTORY: str = "logs"
+    METADATA_BACKEND: str = "json"  # "json" (sidecar per recording) or "sqlite"
+    METADATA_DB_PATH: str = "data/recordings.db"
+    SCAN_CONCURRENCY: int = 4  # Worker threads for loading metadata and probing durations at startup
+    MEDIA_CACHE_SIZE: int = 512  # Max. recordings with cached size/duration probe results
+
+    # Frame extraction
+    DECODER_POOL_SIZE: int = 4  # Max. open video decoders (one per video)
+    DECODER_IDLE_TIMEOUT: int = 60  # Seconds until an unused decoder is closed
+    DECODER_FORWARD_WINDOW: float = 5.0  # Decode forward instead of seeking if the target is this close ahead
+    KEYFRAME_INDEX_CACHE_SIZE: int = 32  # Keyframe indexes kept in memory ({filename}.keyframes.json on disk)
+    FRAME_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Memory for encoded preview frames (0 = disabled)
+    FRAME_CACHE_STEP: float = 0.1  # Frame timestamps are quantized to this many seconds
+    FRAME_PREFETCH_NEIGHBORS: int = 1  # Steps before/after a requested frame rendered in the background
+    SPRITE_INTERVAL: float = 10.0  # Seconds between scrubbing thumbnails ({filename}.sprite.jpg)
+    SPRITE_TILE_WIDTH: int = 160  # Thumbnail width in pixels
+    SPRITE_COLUMNS: int = 10  # Thumbnails per sprite sheet row
+
+    # Export
+    FFMPEG_BINARY: str = "ffmpeg"  # ffmpeg executable (name on PATH or absolute path)
+    FFMPEG_TIMEOUT: float = 1800.0  # Seconds until a hanging ffmpeg process is killed (0 = no limit)
+    EXPORT_CONCURRENCY: int = 1  # Exports processed in parallel, further requests are queued
+    EXPORT_NICE: int = 10  # CPU priority of export ffmpeg processes (0-19, higher yields to OBS)
+    EXPORT_PAUSE_WHILE_RECORDING: bool = False  # Don't start queued exports while OBS is recording
+    EXPORT_JOB_HISTORY: int = 50  # Finished export jobs kept for status queries
+    EXPORT_CACHE_MAX_BYTES: int = 5 * 1024 ** 3  # Disk space for exported clips ({VIDEO_DIRECTORY}/exports)
+    EXPORT_CACHE_MAX_AGE_SECONDS: float = 604800.0  # Exports unused for this long are deleted (7 days)
     
     # OBS settings
     OBS_HOST: str = "localhost"
     OBS_PORT: int = 4455
     OBS_PASSWORD: str = ""
     OBS_RECONNECT_MAX_DELAY: int = 30  # Maximum delay between reconnection attempts
+    OBS_REQUEST_TIMEOUT: float = 5.0  # Seconds to wait for an OBS response before giving up
+    OBS_RECONCILE_INTERVAL: float = 30.0  # Seconds between status checks; state changes arrive as events
+    OBS_READ_CACHE_TTL: float = 0.5  # Seconds a preview screenshot or recording status is reused for all clients
+    PREVIEW_MIN_INTERVAL: float = 0.5  # Fastest live preview rate (limited by OBS_READ_CACHE_TTL)
+    PREVIEW_MAX_INTERVAL: float = 2.0  # Slowest rate when OBS is slow or unavailable
 
     # Audio monitoring settings
     AUDIO_CHECK_INTERVAL: int = 30  # Seconds between automatic audio checks
@@ -52,6 +83,7 @@ class Settings(BaseSettings):
     # Recording resilience settings
     RECORDING_START_RETRIES: int = 3  # Number of attempts to start recording
     RECORDING_RETRY_DELAY: int = 2  # Seconds between recording start retries
+    CAMERA_SETTLE_TIME: float = 1.0  # Seconds between camera reload and recording start
 
     # UI settings
     SHOW_LOGO: bool = True
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime, time, timedelta, timezone
 from typing import Optional
 import json
+import os
 from zoneinfo import ZoneInfo
 
 
@@ -14,6 +15,12 @@ def _generate_filename() -> str:
     return local_now.strftime("%y-%m-%d--%H-%M-%S")
 
 
+def is_metadata_sidecar(name: str) -> bool:
+    """Whether a directory entry is a recording's {filename}.json (not e.g. {filename}.keyframes.json)"""
+    stem, extension = os.path.splitext(name)
+    return extension == ".json" and "." not in stem
+
+
 class VideoFile(BaseModel):
     """Model representing a video file"""
 
@@ -145,6 +152,17 @@ class VideoFile(BaseModel):
             return None
 
 
+class MediaInfo(BaseModel):
+    """Container-level metadata of a recording"""
+
+    duration: float
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    codec: Optional[str] = None
+    keyframes: Optional[int] = None
+
+
 class VideoExportRequest(BaseModel):
     """Request model for video export"""
     
@@ -171,7 +171,7 @@ class AudioMonitorService:
             logger.info(f"Reloading camera (reload #{self.camera_reloads})...")
 
             # Use the existing reload_camera method
-            await asyncio.to_thread(self.obs_service.reload_camera)
+            await self.obs_service.reload_camera()
 
             # Wait for camera to stabilize
             await asyncio.sleep(2)
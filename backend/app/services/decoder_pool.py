@@ -0,0 +1,218 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from app.services.media_cache import file_identity
+
+logger = logging.getLogger(__name__)
+
+
+class _Decoder:
+    """An open cv2 capture that remembers where it is positioned"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.capture: Optional[cv2.VideoCapture] = None
+        self.identity = None
+        self.fps = 0.0
+        # Timestamp (seconds) of the frame the next read() returns
+        self.position: Optional[float] = None
+        self.last_used = time.monotonic()
+        # Set once the decoder was removed from the pool
+        self.retired = False
+
+    def open(self, identity):
+        self.close()
+        self.capture = cv2.VideoCapture(self.path)
+        self.identity = identity
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.position = None
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        self.position = None
+
+    def read_at(
+        self,
+        seconds: float,
+        forward_window: float,
+        keyframe: Optional[float] = None
+    ) -> Optional[np.ndarray]:
+        """Decode the frame at the timestamp; caller must hold the lock"""
+        distance = seconds - self.position if self.position is not None else None
+        forward = distance is not None and self.fps > 0 and distance >= 0
+        if forward:
+            if keyframe is not None:
+                # A seek restarts decoding at the GOP's keyframe, so decoding
+                # forward only pays off while we are already inside that GOP
+                forward = self.position >= keyframe
+            else:
+                forward = distance <= forward_window
+
+        if forward:
+            # Slightly ahead of the last frame: decode forward instead of re-seeking
+            for _ in range(int(round(distance * self.fps))):
+                if not self.capture.grab():
+                    self.position = None
+                    return None
+        else:
+            self.capture.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000)
+
+        ret, frame = self.capture.read()
+        if not ret:
+            self.position = None
+            return None
+
+        if self.fps > 0:
+            self.position = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000 + 1 / self.fps
+        return frame
+
+
+class DecoderPool:
+    """
+    Pool of open, positioned video decoders.
+
+    Keeps at most one decoder per video, up to max_open in total (LRU
+    eviction), and closes decoders that were idle for idle_timeout seconds.
+    Requests for the same video are serialized on that video's decoder;
+    different videos decode in parallel. All methods are blocking and meant
+    to be called from worker threads.
+    """
+
+    def __init__(self, max_open: int = 4, idle_timeout: float = 60.0, forward_window: float = 5.0):
+        self.max_open = max(1, max_open)
+        self.idle_timeout = idle_timeout
+        self.forward_window = forward_window
+        self._decoders: "OrderedDict[str, _Decoder]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop_reaper = threading.Event()
+
+        self.opened = 0
+        self.reused = 0
+
+    def read_frame(
+        self,
+        path: str,
+        seconds: float,
+        keyframe: Optional[float] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Decode the frame at the given timestamp (seconds) of a video
+
+        Args:
+            path: Video path
+            seconds: Timestamp in seconds
+            keyframe: Start of the GOP containing the timestamp (from the
+                keyframe index); replaces the forward window heuristic
+        """
+        try:
+            identity = file_identity(os.stat(path))
+        except OSError:
+            return None
+
+        decoder = self._acquire(path)
+        with decoder.lock:
+            if decoder.capture is None or decoder.identity != identity:
+                # First use, or the file changed (e.g. a recording still growing)
+                decoder.open(identity)
+                self.opened += 1
+            else:
+                self.reused += 1
+
+            decoder.last_used = time.monotonic()
+            if not decoder.capture.isOpened():
+                decoder.close()
+                return None
+            frame = decoder.read_at(seconds, self.forward_window, keyframe)
+
+            if decoder.retired:
+                # Released or evicted while this request was waiting
+                decoder.close()
+            return frame
+
+    def release(self, path: str):
+        """Close the decoder of a video (e.g. before deleting it)"""
+        with self._lock:
+            decoder = self._decoders.pop(path, None)
+        if decoder:
+            with decoder.lock:
+                decoder.retired = True
+                decoder.close()
+
+    def close_idle(self) -> int:
+        """Close decoders that have not been used within the idle timeout"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                path for path, decoder in self._decoders.items()
+                if now - decoder.last_used > self.idle_timeout
+            ]
+        for path in idle:
+            self.release(path)
+        return len(idle)
+
+    def close_all(self):
+        """Close all decoders and stop the idle reaper"""
+        self._stop_reaper.set()
+        with self._lock:
+            paths = list(self._decoders)
+        for path in paths:
+            self.release(path)
+
+    def get_stats(self) -> dict:
+        """Get pool usage counters"""
+        with self._lock:
+            open_count = len(self._decoders)
+        return {
+            "open": open_count,
+            "max_open": self.max_open,
+            "opened": self.opened,
+            "reused": self.reused
+        }
+
+    def _acquire(self, path: str) -> _Decoder:
+        evicted = []
+        with self._lock:
+            decoder = self._decoders.get(path)
+            if decoder is None:
+                decoder = _Decoder(path)
+                self._decoders[path] = decoder
+            self._decoders.move_to_end(path)
+
+            # Evict least recently used decoders that are not busy
+            for other_path, other in list(self._decoders.items()):
+                if len(self._decoders) <= self.max_open:
+                    break
+                if other is not decoder and other.lock.acquire(blocking=False):
+                    del self._decoders[other_path]
+                    evicted.append(other)
+
+            self._start_reaper()
+
+        for other in evicted:
+            other.retired = True
+            other.close()
+            other.lock.release()
+        return decoder
+
+    def _start_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._stop_reaper.clear()
+            self._reaper = threading.Thread(target=self._reap_loop, name="decoder-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._stop_reaper.wait(max(1.0, self.idle_timeout / 2)):
+            closed = self.close_idle()
+            if closed:
+                logger.debug(f"Closed {closed} idle video decoders")
@@ -0,0 +1,201 @@
+"""
+Content-addressed cache of exported subclips
+
+An export is fully determined by the source file version and the export
+parameters, so it is stored under a hash of exactly those:
+
+    {directory}/{key}/{download name}.mp4
+
+A repeated request for the same clip returns the stored file without
+running ffmpeg. Entries are evicted least recently used first once the
+cache exceeds its byte budget, and when they haven't been used for max_age.
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Set
+
+from app.services.media_cache import FileIdentity
+
+logger = logging.getLogger(__name__)
+
+# Bump when the export pipeline changes in a way that alters the output
+_KEY_VERSION = 1
+_STAGING_PREFIX = ".staging-"
+
+
+class ExportEntry(NamedTuple):
+    path: str
+    size: int
+
+
+class ExportCache:
+    """
+    LRU cache of export files, bounded by total bytes and entry age.
+
+    The index is kept in memory and rebuilt from the directory at startup,
+    using the file access times (updated on every hit) as LRU order. Not
+    thread-safe; used from the event loop.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 5 * 1024 ** 3, max_age: float = 7 * 86400):
+        self.directory = directory
+        self.max_bytes = max(0, max_bytes)
+        self.max_age = max_age
+        self._entries: "OrderedDict[str, ExportEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Staging directories of exports still being written by this process
+        self._staging: Set[str] = set()
+
+    @staticmethod
+    def key(source: str, identity: FileIdentity, start: float, end: float, mode: str) -> str:
+        """Cache key of an export of the given source file version"""
+        material = f"{_KEY_VERSION}|{source}|{identity}|{start:.3f}|{end:.3f}|{mode}"
+        return hashlib.sha256(material.encode()).hexdigest()[:20]
+
+    def load(self):
+        """
+        Index the existing entries and remove staging directories abandoned
+        by earlier runs; call before the first export is started
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for name in os.listdir(self.directory):
+            entry_dir = os.path.join(self.directory, name)
+            if name.startswith(_STAGING_PREFIX):
+                if entry_dir not in self._staging:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            if not os.path.isdir(entry_dir):
+                continue
+            files = os.listdir(entry_dir)
+            if len(files) != 1:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            path = os.path.join(entry_dir, files[0])
+            found.append((_last_used(path), name, ExportEntry(path, os.path.getsize(path))))
+
+        self._entries.clear()
+        for _, key, entry in sorted(found):
+            self._entries[key] = entry
+        self.total_bytes = sum(entry.size for entry in self._entries.values())
+        logger.info(
+            f"Export cache: {len(self._entries)} files, "
+            f"{self.total_bytes / 1024 ** 2:.1f} MiB in {self.directory}"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached export or None"""
+        entry = self._entries.get(key)
+        if entry is None or not os.path.exists(entry.path):
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        try:
+            # Persist the LRU order for the next start
+            os.utime(entry.path)
+        except OSError:
+            pass
+        return entry.path
+
+    def staging_path(self, key: str, filename: str) -> str:
+        """Path to write a new export to before it is committed"""
+        os.makedirs(self.directory, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=f"{_STAGING_PREFIX}{key}-", dir=self.directory)
+        self._staging.add(staging_dir)
+        return os.path.join(staging_dir, filename)
+
+    def commit(self, key: str, staging_path: str) -> str:
+        """Move a finished export into the cache and evict; returns its final path"""
+        staging_dir = os.path.dirname(staging_path)
+        entry_dir = os.path.join(self.directory, key)
+        self._staging.discard(staging_dir)
+
+        if key in self._entries:
+            self._remove(key)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(staging_dir, entry_dir)
+
+        path = os.path.join(entry_dir, os.path.basename(staging_path))
+        entry = ExportEntry(path, os.path.getsize(path))
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+        self.evict(keep=key)
+        return path
+
+    def discard(self, staging_path: str):
+        """Remove the staging directory of a failed export"""
+        staging_dir = os.path.dirname(staging_path)
+        self._staging.discard(staging_dir)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove entries older than max_age and the least recently used ones
+        beyond max_bytes
+
+        Args:
+            keep: Entry that is never evicted (the one just added)
+
+        Returns:
+            Number of removed entries
+        """
+        now = time.time()
+        evicted = 0
+        for key in list(self._entries):
+            if key == keep:
+                continue
+            entry = self._entries[key]
+            too_big = self.total_bytes > self.max_bytes
+            too_old = self.max_age and now - _last_used(entry.path) > self.max_age
+            if not (too_big or too_old):
+                # LRU order: if this one is recent enough, the following are too
+                break
+            self._remove(key)
+            evicted += 1
+
+        if evicted:
+            self.evictions += evicted
+            logger.info(
+                f"Export cache: evicted {evicted} files, "
+                f"{self.total_bytes / 1024 ** 2:.1f} MiB remaining"
+            )
+        return evicted
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+        shutil.rmtree(os.path.dirname(entry.path), ignore_errors=True)
+
+
+def _last_used(path: str) -> float:
+    """Last access of an entry (written or hit); 0 if it is gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0.0
+    return max(stat.st_atime, stat.st_mtime)
@@ -0,0 +1,372 @@
+"""
+Export job queue
+
+Subclip exports are queued and processed by a small pool of workers instead
+of running inside the HTTP request, so the number of concurrent ffmpeg
+processes is bounded no matter how many people export at once. Exports run
+with a lower CPU priority than the recording and can optionally be held
+back entirely while OBS is recording.
+
+State changes are published as events (queued, started, progress, finished,
+failed, cancelled) to subscribers, which the API streams as Server-Sent
+Events.
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+import time as time_module
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Literal, Optional, Set, Tuple
+
+from app.services.subclip import ExportMode
+
+logger = logging.getLogger(__name__)
+
+JobState = Literal["queued", "running", "finished", "failed", "cancelled"]
+
+# How often a paused worker checks whether the recording has stopped
+_PAUSE_POLL_INTERVAL = 2.0
+# Progress events are sent at most this often per job (and on every full percent)
+_PROGRESS_EVENT_INTERVAL = 0.5
+# Undelivered events per subscriber; the oldest are dropped for slow clients
+_SUBSCRIBER_BUFFER = 100
+
+ExportEvent = Tuple[str, dict]
+
+
+class ExportSubscription:
+    """Events of one job (or of all jobs) for a single listener"""
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self._events: asyncio.Queue = asyncio.Queue(_SUBSCRIBER_BUFFER)
+
+    def push(self, event: ExportEvent):
+        if self._events.full():
+            self._events.get_nowait()
+        self._events.put_nowait(event)
+
+    async def get(self) -> ExportEvent:
+        return await self._events.get()
+
+
+class ExportJob:
+    """A subclip export waiting in or processed by the queue"""
+
+    def __init__(self, video_id: str, start_seconds: float, end_seconds: float, mode: ExportMode):
+        self.id = secrets.token_hex(8)
+        self.video_id = video_id
+        self.start_seconds = start_seconds
+        self.end_seconds = end_seconds
+        self.mode = mode
+        self.state: JobState = "queued"
+        self.progress = 0.0
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.file: Optional[dict] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("finished", "failed", "cancelled")
+
+    def to_dict(self, position: Optional[int] = None) -> dict:
+        return {
+            "id": self.id,
+            "video_id": self.video_id,
+            "start_time": self.start_seconds,
+            "end_time": self.end_seconds,
+            "mode": self.mode,
+            "state": self.state,
+            "position": position,
+            "progress": round(self.progress, 3),
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "file": self.file,
+            "error": self.error
+        }
+
+
+class ExportQueue:
+    """
+    Runs subclip exports with bounded concurrency.
+
+    Jobs are processed in submission order by `concurrency` workers. ffmpeg
+    runs with the given nice value; with pause_while_recording no new job is
+    started while OBS is recording (running jobs are finished). Direct
+    downloads take their ffmpeg slot from the same pool (reserve_slot).
+    """
+
+    def __init__(
+        self,
+        file_service,
+        obs_service,
+        concurrency: int = 1,
+        pause_while_recording: bool = False,
+        nice: int = 10,
+        history: int = 50
+    ):
+        self.file_service = file_service
+        self.obs_service = obs_service
+        self.concurrency = max(1, concurrency)
+        self.pause_while_recording = pause_while_recording
+        self.nice = nice
+        self.history = max(1, history)
+        self._jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._subscriptions: Set[ExportSubscription] = set()
+        # ffmpeg slots shared by the workers and direct (streamed) exports
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.streaming = 0
+
+    @property
+    def paused(self) -> bool:
+        """Whether queued jobs are currently held back by a running recording"""
+        return self.pause_while_recording and self.obs_service.recording
+
+    def start(self):
+        """Start the workers"""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.concurrency)
+        ]
+        logger.info(
+            f"Export queue started (concurrency: {self.concurrency}, nice: {self.nice}, "
+            f"pause while recording: {self.pause_while_recording})"
+        )
+
+    async def stop(self):
+        """Stop the workers, cancelling running exports"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, video_id: str, start_seconds: float, end_seconds: float, mode: ExportMode = "fast") -> ExportJob:
+        """Queue an export of [start_seconds, end_seconds) of a recording"""
+        job = ExportJob(video_id, start_seconds, end_seconds, mode)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._emit("queued", job)
+        logger.info(
+            f"Queued export {job.id}: {video_id} {start_seconds:.1f}-{end_seconds:.1f}s ({mode}), "
+            f"position {self.position(job)}"
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        return self._jobs.get(job_id)
+
+    def position(self, job: ExportJob) -> Optional[int]:
+        """1-based position among the queued jobs, None once the job has started"""
+        if job.state != "queued":
+            return None
+        position = 1
+        for other in self._jobs.values():
+            if other is job:
+                return position
+            if other.state == "queued":
+                position += 1
+        return None
+
+    def describe(self, job: ExportJob) -> dict:
+        """Job status including its queue position"""
+        return job.to_dict(self.position(job))
+
+    def list_jobs(self) -> List[dict]:
+        """All known jobs, oldest first"""
+        queued = 0
+        jobs = []
+        for job in self._jobs.values():
+            position = None
+            if job.state == "queued":
+                queued += 1
+                position = queued
+            jobs.append(job.to_dict(position))
+        return jobs
+
+    def unfinished_jobs(self) -> List[ExportJob]:
+        """Queued and running jobs, oldest first"""
+        return [job for job in self._jobs.values() if not job.done]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job
+
+        Returns:
+            False if the job does not exist or has already finished
+        """
+        job = self._jobs.get(job_id)
+        if not job or job.done:
+            return False
+
+        if job._task:
+            # Kills ffmpeg; the worker records the cancellation
+            job._task.cancel()
+        else:
+            self._finish(job, "cancelled")
+        logger.info(f"Cancelled export {job.id}")
+        return True
+
+    def subscribe(self, job_id: Optional[str] = None) -> ExportSubscription:
+        """Receive the events of one job, or of all jobs if job_id is None"""
+        subscription = ExportSubscription(job_id)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ExportSubscription):
+        self._subscriptions.discard(subscription)
+
+    async def reserve_slot(self) -> Optional[Callable[[], None]]:
+        """
+        Take an ffmpeg slot for an export outside the queue (direct download)
+
+        Returns:
+            A function that frees the slot again (safe to call more than
+            once), or None if exports are paused or all slots are busy
+        """
+        if self.paused or self._slots.locked():
+            return None
+
+        await self._slots.acquire()
+        self.streaming += 1
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.streaming -= 1
+                self._slots.release()
+
+        return release
+
+    def get_status(self) -> dict:
+        states = [job.state for job in self._jobs.values()]
+        return {
+            "concurrency": self.concurrency,
+            "paused": self.paused,
+            "queued": states.count("queued"),
+            "running": states.count("running"),
+            "streaming": self.streaming,
+            "subscribers": len(self._subscriptions)
+        }
+
+    async def _worker(self, number: int):
+        while True:
+            job: ExportJob = await self._queue.get()
+            try:
+                async with self._slots:
+                    # Checked while holding the slot: a recording that started
+                    # while this worker waited for it pauses the job as well
+                    await self._wait_until_idle(job)
+                    if job.done:
+                        continue  # Cancelled while waiting
+
+                    task = job._task = asyncio.create_task(self._run(job))
+                    try:
+                        # wait() doesn't raise when only the job is cancelled
+                        await asyncio.wait([task])
+                    except asyncio.CancelledError:
+                        task.cancel()
+                        await asyncio.gather(task, return_exceptions=True)
+                        raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Export worker {number} error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _wait_until_idle(self, job: ExportJob):
+        if self.paused and not job.done:
+            logger.info(f"Export {job.id} waits for the recording to stop")
+        while self.paused and not job.done:
+            await asyncio.sleep(_PAUSE_POLL_INTERVAL)
+
+    async def _run(self, job: ExportJob):
+        job.state = "running"
+        job.started_at = datetime.now(timezone.utc)
+        self._emit("started", job)
+        self._emit_positions()
+        last_event = (0.0, 0)
+
+        def report(fraction: float):
+            nonlocal last_event
+            job.progress = fraction
+            now = time_module.monotonic()
+            percent = int(fraction * 100)
+            if percent != last_event[1] or now - last_event[0] >= _PROGRESS_EVENT_INTERVAL:
+                last_event = (now, percent)
+                self._emit("progress", job)
+
+        try:
+            video = self.file_service.get_file(job.video_id)
+            if not video:
+                self._finish(job, "failed", "Video not found")
+                return
+
+            start_time = (video.start_time + timedelta(seconds=job.start_seconds)).time()
+            end_time = (video.start_time + timedelta(seconds=job.end_seconds)).time()
+            output_path = await self.file_service.export_subclip(
+                job.video_id, start_time, end_time, job.mode, on_progress=report, nice=self.nice
+            )
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled")
+            raise
+
+        if not output_path:
+            self._finish(job, "failed", "Export failed")
+            return
+
+        job.file = {
+            "filename": os.path.basename(output_path),
+            "size": self.file_service.get_filesize(output_path),
+            "url": self.file_service.get_video_url(output_path)
+        }
+        job.progress = 1.0
+        self._finish(job, "finished")
+
+    def _finish(self, job: ExportJob, state: JobState, error: Optional[str] = None):
+        was_queued = job.state == "queued"
+        job.state = state
+        job.error = error
+        job.finished_at = datetime.now(timezone.utc)
+        job._task = None
+        self._emit(state, job)
+        if was_queued:
+            self._emit_positions()
+        if job.started_at:
+            logger.info(
+                f"Export {job.id} {state} after "
+                f"{(job.finished_at - job.started_at).total_seconds():.1f}s"
+            )
+        self._trim()
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        done = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in done[:max(0, len(done) - self.history)]:
+            del self._jobs[job_id]
+
+    def _emit(self, event: str, job: ExportJob):
+        if not self._subscriptions:
+            return
+        data = self.describe(job)
+        for subscription in self._subscriptions:
+            if subscription.job_id in (None, job.id):
+                subscription.push((event, data))
+
+    def _emit_positions(self):
+        """Tell waiting jobs about their new queue position"""
+        for job in self._jobs.values():
+            if job.state == "queued":
+                self._emit("queued", job)
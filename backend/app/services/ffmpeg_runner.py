@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FFmpegError(Exception):
+    """ffmpeg could not be started, failed or timed out"""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr: str = ""):
+        super().__init__(f"{message}: {stderr.strip()}" if stderr.strip() else message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class FFmpegProgress(NamedTuple):
+    """One block of ffmpeg's -progress output"""
+    out_time: float  # Seconds of output written so far
+    frame: Optional[int]
+    speed: Optional[float]  # Multiple of realtime
+    done: bool
+
+
+ProgressCallback = Callable[[FFmpegProgress], None]
+
+
+def _parse_progress(block: dict) -> FFmpegProgress:
+    """Convert a key=value block of -progress output"""
+    # out_time_us and (despite its name) out_time_ms are both microseconds
+    out_time_us = block.get("out_time_us") or block.get("out_time_ms")
+    try:
+        out_time = max(0.0, int(out_time_us) / 1_000_000)
+    except (TypeError, ValueError):
+        out_time = 0.0
+
+    try:
+        frame = int(block["frame"])
+    except (KeyError, ValueError):
+        frame = None
+
+    try:
+        speed = float(block.get("speed", "").rstrip("x"))
+    except ValueError:
+        speed = None
+
+    return FFmpegProgress(out_time=out_time, frame=frame, speed=speed, done=block.get("progress") == "end")
+
+
+class FFmpegRunner:
+    """
+    Runs ffmpeg as an asyncio subprocess.
+
+    Progress is read from `-progress pipe:1`, stderr is kept only up to
+    stderr_limit bytes (the tail, where ffmpeg reports errors), and the
+    process is killed when the awaiting task is cancelled or the timeout
+    expires, so no orphaned encoders keep running.
+    """
+
+    def __init__(self, binary: str = "ffmpeg", timeout: Optional[float] = None, stderr_limit: int = 16 * 1024):
+        self.binary = binary
+        self.timeout = timeout
+        self.stderr_limit = stderr_limit
+
+    async def run(
+        self,
+        args: List[str],
+        on_progress: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+        nice: int = 0
+    ):
+        """
+        Run ffmpeg with the given arguments (inputs, filters, outputs)
+
+        Args:
+            args: ffmpeg arguments without the binary and global options
+            on_progress: Called for every progress block
+            timeout: Seconds until ffmpeg is killed (default: runner timeout)
+            nice: CPU priority of the process (higher = yields to others)
+
+        Raises:
+            FFmpegError: ffmpeg failed, timed out or is not installed
+        """
+        process = await self._spawn(["-progress", "pipe:1", *args], nice)
+        stderr = bytearray()
+        timeout = timeout if timeout is not None else self.timeout
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self._read_progress(process.stdout, on_progress),
+                    self._read_stderr(process.stderr, stderr),
+                    process.wait()
+                ),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            raise FFmpegError(f"ffmpeg timed out after {timeout:g}s", stderr=stderr.decode(errors="replace"))
+        finally:
+            if process.returncode is None:
+                # Cancelled or timed out: don't leave ffmpeg running
+                process.kill()
+                await asyncio.shield(process.wait())
+
+        if process.returncode != 0:
+            raise FFmpegError(
+                f"ffmpeg exited with code {process.returncode}",
+                returncode=process.returncode,
+                stderr=stderr.decode(errors="replace")
+            )
+
+    async def stream(self, args: List[str], chunk_size: int = 64 * 1024, nice: int = 0) -> AsyncIterator[bytes]:
+        """
+        Run ffmpeg and yield what it writes to stdout (output "pipe:1")
+
+        ffmpeg is only read from as fast as the consumer takes the chunks,
+        so a slow client throttles it via the pipe. Closing the generator
+        early (e.g. client disconnected) kills the process. There is no
+        timeout, as the duration depends on the consumer.
+
+        Raises:
+            FFmpegError: ffmpeg failed (after the data it produced was yielded)
+        """
+        process = await self._spawn(args, nice)
+        stderr = bytearray()
+        stderr_task = asyncio.create_task(self._read_stderr(process.stderr, stderr))
+
+        try:
+            while chunk := await process.stdout.read(chunk_size):
+                yield chunk
+            await process.wait()
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await asyncio.shield(process.wait())
+            await asyncio.gather(stderr_task, return_exceptions=True)
+
+        if process.returncode != 0:
+            raise FFmpegError(
+                f"ffmpeg exited with code {process.returncode}",
+                returncode=process.returncode,
+                stderr=stderr.decode(errors="replace")
+            )
+
+    async def _spawn(self, args: List[str], nice: int) -> asyncio.subprocess.Process:
+        cmd = [
+            self.binary, "-hide_banner", "-nostdin", "-nostats", "-y",
+            "-loglevel", "error",
+            *args
+        ]
+        logger.debug(f"Running {' '.join(cmd)}")
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            raise FFmpegError(f"Could not start {self.binary}: {e}")
+
+        if nice:
+            try:
+                os.setpriority(os.PRIO_PROCESS, process.pid, nice)
+            except (AttributeError, OSError) as e:
+                logger.debug(f"Could not lower ffmpeg priority: {e}")
+
+        return process
+
+    async def _read_progress(self, stream: asyncio.StreamReader, on_progress: Optional[ProgressCallback]):
+        block = {}
+        async for raw in stream:
+            key, _, value = raw.decode(errors="replace").strip().partition("=")
+            block[key] = value
+            if key == "progress":
+                if on_progress:
+                    on_progress(_parse_progress(block))
+                block = {}
+
+    async def _read_stderr(self, stream: asyncio.StreamReader, buffer: bytearray):
+        while chunk := await stream.read(4096):
+            buffer.extend(chunk)
+            if len(buffer) > self.stderr_limit:
+                del buffer[:len(buffer) - self.stderr_limit]
@@ -1,41 +1,152 @@
 import os
 import logging
 import asyncio
-from typing import List, Optional, Dict
+import time as time_module
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, List, Literal, Optional, Dict, Tuple
 from datetime import datetime, time, timedelta, timezone
 import cv2
 import base64
-from io import BytesIO
-from PIL import Image
-from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
 
-from app.models.video import VideoFile
+from app.models.video import VideoFile, MediaInfo, is_metadata_sidecar
+from app.services.recording_catalog import RecordingCatalog
+from app.services.metadata_store import MetadataStore, StoredMedia
+from app.services.media_probe import probe_media
+from app.services.media_cache import FileIdentity, MediaInfoCache, file_identity
+from app.services.decoder_pool import DecoderPool
+from app.services.keyframe_index import KeyframeIndex
+from app.services.frame_cache import FrameCache
+from app.services.sprite_sheet import build_sprite_sheet
+from app.services.frame_pipeline import FramePipeline, FrameSpec, DEFAULT_FRAME_SPEC
+from app.services.subclip import (
+    ExportMode, Segment, plan_segments, segment_command, stream_command, concat_command
+)
+from app.services.ffmpeg_runner import FFmpegRunner, FFmpegProgress
+from app.services.export_cache import ExportCache
 
 logger = logging.getLogger(__name__)
 
+SeekMode = Literal["keyframe", "exact"]
+
 
 class FileService:
     """Service for managing video files"""
     
-    def __init__(self, video_directory: str = "videos"):
+    def __init__(
+        self,
+        video_directory: str = "videos",
+        metadata_store: Optional[MetadataStore] = None,
+        scan_concurrency: int = 4,
+        media_cache_size: int = 512,
+        decoder_pool: Optional[DecoderPool] = None,
+        keyframe_cache_size: int = 32,
+        frame_cache: Optional[FrameCache] = None,
+        frame_step: float = 0.1,
+        frame_prefetch: int = 1,
+        sprite_interval: float = 10.0,
+        sprite_tile_width: int = 160,
+        sprite_columns: int = 10,
+        ffmpeg: Optional[FFmpegRunner] = None,
+        export_cache: Optional[ExportCache] = None
+    ):
         self.video_directory = video_directory
-        self.files: List[VideoFile] = []
+        self.metadata_store = metadata_store
+        self._stored_media: Dict[str, StoredMedia] = {}
+        self.scan_concurrency = max(1, scan_concurrency)
+        self.media_cache = MediaInfoCache(media_cache_size)
+        self.decoder_pool = decoder_pool or DecoderPool()
+        self.keyframe_cache = MediaInfoCache(keyframe_cache_size)
+        self._keyframe_builds: Dict[str, asyncio.Task] = {}
+        self.frame_cache = frame_cache or FrameCache()
+        self.frame_pipeline = FramePipeline()
+        self.frame_step = frame_step if frame_step > 0 else 0.1
+        self.frame_prefetch = max(0, frame_prefetch)
+        self.sprite_interval = sprite_interval
+        self.sprite_tile_width = sprite_tile_width
+        self.sprite_columns = sprite_columns
+        self._sprite_builds: Dict[str, asyncio.Task] = {}
+        # File version each failed sprite build was attempted for
+        self._sprite_failures: Dict[str, FileIdentity] = {}
+        self.ffmpeg = ffmpeg or FFmpegRunner()
+        self.export_cache = export_cache or ExportCache(os.path.join(video_directory, "exports"))
+        self.catalog = RecordingCatalog()
         self._initialized = False
+        self._ready = asyncio.Event()
+        self._init_done = asyncio.Event()
+        self._init_task: Optional[asyncio.Task] = None
+
+    @property
+    def files(self) -> List[VideoFile]:
+        """All managed video files, oldest first"""
+        return list(self.catalog)
     
+    @property
+    def is_ready(self) -> bool:
+        """Whether the catalog has been loaded and archive requests can be served"""
+        return self._ready.is_set()
+
+    async def wait_ready(self):
+        """Wait until the catalog has been loaded"""
+        await self._ready.wait()
+
+    async def wait_initialized(self):
+        """Wait until initialization, including its retention cleanup, has finished"""
+        await self._init_done.wait()
+
+    def start(self, delete_age: Optional[timedelta] = None):
+        """Initialize the file service in the background"""
+        if self._init_task is None or self._init_task.done():
+            self._init_task = asyncio.create_task(self.initialize(delete_age))
+
+    async def stop(self):
+        """Cancel background initialization and index/sprite builds, close decoders"""
+        tasks = list(self._keyframe_builds.values()) + list(self._sprite_builds.values())
+        if self._init_task and not self._init_task.done():
+            tasks.append(self._init_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.frame_cache.close()
+        await asyncio.to_thread(self.decoder_pool.close_all)
+
+    def get_status(self) -> dict:
+        """Get catalog warm-up status"""
+        return {
+            "ready": self.is_ready,
+            "initialized": self._initialized,
+            "loaded": len(self.catalog)
+        }
+
     async def initialize(self, delete_age: Optional[timedelta] = None):
         """Initialize file service"""
         if self._initialized:
             return
         
-        await self.scan_files()
-        
-        if delete_age:
-            await self.delete_old_files(delete_age)
-        
-        await self.delete_subclips()
-        
-        self._initialized = True
-        logger.info("File service initialized")
+        try:
+            await self.scan_files()
+
+            # A directory listing; indexed before exports can start and commit
+            self.export_cache.load()
+
+            # Archive requests can be served from here on; retention cleanup
+            # continues in the background
+            self._ready.set()
+            logger.info(f"Recording catalog ready ({len(self.catalog)} files)")
+
+            if delete_age:
+                await self.delete_old_files(delete_age)
+
+            await self.cleanup_exports()
+
+            self._initialized = True
+            logger.info("File service initialized")
+        finally:
+            # The periodic cleanup must not start while this pass still runs,
+            # nor wait forever if it failed
+            self._init_done.set()
     
     async def scan_files(self):
         """Scan video directory for existing files"""
@@ -43,76 +154,205 @@ class FileService:
             if not os.path.exists(self.video_directory):
                 os.makedirs(self.video_directory)
                 logger.info(f"Created video directory: {self.video_directory}")
-                return
-            
-            # Scan for JSON metadata files
-            for filename in os.listdir(self.video_directory):
-                if filename.endswith(".json"):
-                    filepath = os.path.join(self.video_directory, filename)
-                    video_file = VideoFile.from_json_file(filepath)
-                    
-                    if video_file:
-                        # Calculate end time if missing
-                        if video_file.end_time is None:
-                            duration = await self.calculate_video_duration(video_file.filename)
-                            if duration:
-                                video_file.end_time = video_file.start_time + timedelta(seconds=duration - 1)
-                                video_file.to_json_file(self.video_directory)
-                        
-                        self.files.append(video_file)
-                        logger.info(f"Loaded video file: {video_file.filename}")
-            
-            logger.info(f"Scanned {len(self.files)} video files")
-            
+
+            started = time_module.monotonic()
+
+            # Sidecar loading and duration probing are blocking; run them on a
+            # bounded pool so the event loop stays responsive during the scan
+            with ThreadPoolExecutor(
+                max_workers=self.scan_concurrency,
+                thread_name_prefix="file-scan"
+            ) as pool:
+                if self.metadata_store:
+                    loaded = await self._load_from_store(pool)
+                else:
+                    loaded = await self._load_from_sidecars(pool)
+
+                # Calculate end time for recordings that were never finished;
+                # recordings started during the scan are still being written
+                unfinished = [f for f in loaded if f.end_time is None]
+                if unfinished:
+                    logger.info(f"Probing duration of {len(unfinished)} unfinished recordings")
+                    await self._run_with_progress(
+                        "Probing durations",
+                        [self._complete_end_time(f, pool) for f in unfinished]
+                    )
+
+            logger.info(
+                f"Scanned {len(self.catalog)} video files in "
+                f"{time_module.monotonic() - started:.2f}s "
+                f"(concurrency: {self.scan_concurrency})"
+            )
+
         except Exception as e:
             logger.exception(e)
             logger.error("Error scanning video files")
+
+    async def _load_from_sidecars(self, pool: ThreadPoolExecutor) -> List[VideoFile]:
+        """Load all JSON sidecars in parallel on the given pool; returns the added recordings"""
+        loop = asyncio.get_running_loop()
+        names = await loop.run_in_executor(pool, os.listdir, self.video_directory)
+        loaded = []
+
+        async def load(name: str):
+            filepath = os.path.join(self.video_directory, name)
+            video_file = await loop.run_in_executor(pool, VideoFile.from_json_file, filepath)
+            # Recordings started while the scan runs are already in the catalog
+            if video_file and video_file.filename not in self.catalog:
+                self.catalog.add(video_file)
+                loaded.append(video_file)
+
+        await self._run_with_progress(
+            "Loading metadata",
+            [load(name) for name in names if is_metadata_sidecar(name)]
+        )
+        return loaded
+
+    async def _load_from_store(self, pool: ThreadPoolExecutor) -> List[VideoFile]:
+        """Load the catalog from the metadata store (imports JSON sidecars once); returns the added recordings"""
+        await self.metadata_store.open()
+        await self.metadata_store.import_json_sidecars(self.video_directory)
+
+        # Probe results saved at stop time, so listing doesn't re-probe every file after a restart
+        self._stored_media = await self.metadata_store.load_media()
+
+        loaded = []
+        for video_file in await self.metadata_store.load_all():
+            # Recordings started while the scan runs are already in the catalog
+            if video_file.filename not in self.catalog:
+                self.catalog.add(video_file)
+                loaded.append(video_file)
+
+        logger.info(f"Loaded {len(loaded)} video files from metadata store")
+        return loaded
+
+    async def _complete_end_time(self, video_file: VideoFile, pool: ThreadPoolExecutor):
+        """Derive a missing end time from the video duration"""
+        loop = asyncio.get_running_loop()
+        duration = await loop.run_in_executor(
+            pool, self._probe_duration, self.get_video_path(video_file.filename)
+        )
+        if duration:
+            video_file.end_time = video_file.start_time + timedelta(seconds=duration - 1)
+            await self.save_metadata(video_file)
+
+    async def _run_with_progress(self, label: str, jobs: list):
+        """Await all jobs, logging progress roughly every 10% or 5 seconds"""
+        total = len(jobs)
+        if not total:
+            return
+
+        done = 0
+        step = max(1, total // 10)
+        last_log = time_module.monotonic()
+
+        for job in asyncio.as_completed(jobs):
+            await job
+            done += 1
+            now = time_module.monotonic()
+            if done % step == 0 or done == total or now - last_log >= 5:
+                logger.info(f"{label}: {done}/{total}")
+                last_log = now
+
+    async def save_metadata(self, video_file: VideoFile):
+        """Persist metadata of a video file without blocking the event loop"""
+        if self.metadata_store:
+            size = None
+            duration = None
+            codec = None
+            if video_file.end_time:
+                video_path = self.get_video_path(video_file.filename)
+                size = await asyncio.to_thread(self.get_filesize, video_path)
+                duration = video_file.duration.total_seconds()
+                info = await asyncio.to_thread(probe_media, video_path)
+                if info:
+                    duration = info.duration
+                    codec = info.codec
+                if size:
+                    self._stored_media[video_file.filename] = StoredMedia(size, duration, codec)
+            await self.metadata_store.upsert(video_file, size=size, duration=duration, codec=codec)
+        else:
+            await asyncio.to_thread(video_file.to_json_file, self.video_directory)
     
     def add_file(self, video_file: VideoFile):
         """Add a video file to the managed list"""
-        if video_file not in self.files:
-            self.files.append(video_file)
+        if self.catalog.add(video_file):
             logger.info(f"Added video file: {video_file.filename}")
     
     def remove_file(self, filename: str) -> bool:
         """Remove a video file from the managed list"""
-        for video_file in self.files:
-            if video_file.filename == filename:
-                self.files.remove(video_file)
-                logger.info(f"Removed video file from list: {filename}")
-                return True
+        self._stored_media.pop(filename, None)
+        self._sprite_failures.pop(filename, None)
+        if self.catalog.remove(filename):
+            logger.info(f"Removed video file from list: {filename}")
+            return True
         return False
     
+    async def rename_file(self, filename: str, new_filename: str) -> Optional[VideoFile]:
+        """
+        Re-register a recording under the name of the file OBS actually wrote
+
+        Only the catalog entry and its metadata move; the video file already
+        has the new name. The caller saves the metadata of the returned file.
+
+        Returns:
+            The renamed VideoFile or None if the recording is unknown
+        """
+        video_file = self.catalog.remove(filename)
+        self._stored_media.pop(filename, None)
+        self._sprite_failures.pop(filename, None)
+        if video_file is None:
+            return None
+
+        if self.metadata_store:
+            await self.metadata_store.delete(filename)
+        else:
+            json_path = self.get_json_path(filename)
+            if os.path.exists(json_path):
+                os.remove(json_path)
+
+        renamed = video_file.model_copy(update={"filename": new_filename})
+        self.catalog.add(renamed)
+        logger.info(f"Renamed video file: {filename} -> {new_filename}")
+        return renamed
+
     def get_file(self, filename: str) -> Optional[VideoFile]:
         """Get a video file by filename"""
-        for video_file in self.files:
-            if video_file.filename == filename:
-                return video_file
-        return None
+        return self.catalog.get(filename)
     
     def get_all_files(self) -> List[VideoFile]:
-        """Get all video files"""
-        return sorted(self.files, key=lambda f: f.start_time, reverse=True)
+        """Get all video files, newest first"""
+        return list(self.catalog.newest_first())
     
     def get_newest_file(self) -> Optional[VideoFile]:
         """Get the newest video file"""
-        if not self.files:
-            return None
-        return max(self.files, key=lambda f: f.start_time)
+        return self.catalog.newest()
     
     def get_file_dict(self) -> Dict[str, str]:
         """Get dictionary of files with descriptors"""
-        return {file.filename: file.get_descriptor() for file in self.files}
+        return {file.filename: file.get_descriptor() for file in self.catalog}
     
     async def delete_file(self, filename: str) -> bool:
         """Delete a video file (both .mp4 and .json)"""
         try:
             video_path = self.get_video_path(filename)
             json_path = self.get_json_path(filename)
+            derived_paths = [
+                self.get_keyframe_index_path(filename),
+                *self.get_sprite_paths(filename)
+            ]
             
             # Remove from list
             self.remove_file(filename)
+
+            if self.metadata_store:
+                await self.metadata_store.delete(filename)
             
+            self.media_cache.invalidate(video_path)
+            self.keyframe_cache.invalidate(video_path)
+            self.frame_cache.invalidate(filename)
+            await asyncio.to_thread(self.decoder_pool.release, video_path)
+
             # Delete files
             if os.path.exists(video_path):
                 os.remove(video_path)
@@ -121,6 +361,10 @@ class FileService:
             if os.path.exists(json_path):
                 os.remove(json_path)
                 logger.info(f"Deleted JSON file: {json_path}")
+
+            for path in derived_paths:
+                if os.path.exists(path):
+                    os.remove(path)
             
             return True
             
@@ -132,11 +376,8 @@ class FileService:
     async def delete_old_files(self, max_age: timedelta) -> int:
         """Delete files older than specified age"""
         deleted_count = 0
-        files_to_delete = []
-        
-        for video_file in self.files:
-            if video_file.age > max_age:
-                files_to_delete.append(video_file.filename)
+        cutoff = datetime.now(timezone.utc) - max_age
+        files_to_delete = [f.filename for f in self.catalog.started_before(cutoff)]
         
         for filename in files_to_delete:
             if await self.delete_file(filename):
@@ -145,29 +386,39 @@ class FileService:
         logger.info(f"Deleted {deleted_count} old video files")
         return deleted_count
     
-    async def delete_subclips(self) -> int:
-        """Delete all subclip files"""
+    async def cleanup_exports(self) -> int:
+        """Evict expired exports from the export cache and delete exports of older versions"""
         deleted_count = 0
         
         try:
+            deleted_count += self.export_cache.evict()
+
+            # Exports used to be written next to the recordings
             for filename in os.listdir(self.video_directory):
-                if filename.startswith("subclip_"):
+                if filename.startswith(("subclip_", "Scheinbar_")) and filename.endswith(".mp4"):
                     filepath = os.path.join(self.video_directory, filename)
                     os.remove(filepath)
                     deleted_count += 1
-                    logger.info(f"Deleted subclip: {filename}")
+                    logger.info(f"Deleted legacy export: {filename}")
         
         except Exception as e:
             logger.exception(e)
-            logger.error("Error deleting subclips")
+            logger.error("Error cleaning up exports")
         
         return deleted_count
+
+    def get_video_url(self, path: str) -> str:
+        """URL of a file below the video directory (served under /videos)"""
+        return "/videos/" + os.path.relpath(path, self.video_directory).replace(os.sep, "/")
     
     async def export_subclip(
         self,
         filename: str,
         start_time: time,
-        end_time: time
+        end_time: time,
+        mode: ExportMode = "fast",
+        on_progress: Optional[Callable[[float], None]] = None,
+        nice: int = 0
     ) -> Optional[str]:
         """
         Export a subclip from a video file
@@ -176,9 +427,13 @@ class FileService:
             filename: Source video filename
             start_time: Start time for the subclip
             end_time: End time for the subclip
+            mode: "fast" stream-copies from the keyframe before the start,
+                "exact" re-encodes, "smart" re-encodes only the edge GOPs
+            on_progress: Called with the completed fraction (0-1) while ffmpeg runs
+            nice: CPU priority of the ffmpeg processes
         
         Returns:
-            Path to the exported subclip or None on error
+            Path to the exported subclip (in the export cache) or None on error
         """
         try:
             video_file = self.get_file(filename)
@@ -203,22 +458,46 @@ class FileService:
                 logger.error("Invalid time range for export")
                 return None
             
-            # Generate output path with format: Scheinbar_YY-MM-DD_HH-MM-{start_seconds}-{end_seconds}.mp4
-            # Using the start time of the subclip, with seconds for uniqueness
-            output_filename = f"Scheinbar_{start_datetime.strftime('%y-%m-%d_%H-%M')}-{int(start_seconds)}-{int(end_seconds)}.mp4"
-            output_path = os.path.join(self.video_directory, output_filename)
-            
-            # Extract subclip using ffmpeg
+            output_filename = self.export_filename(video_file, start_seconds, end_seconds, mode)
+
+            # Exports are deterministic for a source version and parameters
             source_path = self.get_video_path(filename)
-            await asyncio.to_thread(
-                ffmpeg_extract_subclip,
-                source_path,
-                start_seconds,
-                end_seconds,
-                targetname=output_path
+            cache_key = ExportCache.key(
+                filename, file_identity(os.stat(source_path)), start_seconds, end_seconds, mode
             )
+            cached_path = self.export_cache.get(cache_key)
+            if cached_path:
+                logger.info(f"Export of {filename} served from cache: {cached_path}")
+                if on_progress:
+                    on_progress(1.0)
+                return cached_path
             
-            logger.info(f"Exported subclip: {output_filename}")
+            # Plan copied/re-encoded segments on the keyframe index
+            index = await self.get_keyframe_index(filename)
+            codec = await self.get_codec(filename) if mode == "smart" else None
+            segments = plan_segments(mode, start_seconds, end_seconds, index, codec)
+            logger.info(
+                f"Exporting {filename} ({mode}): " + ", ".join(
+                    f"{seg.start:.3f}-{seg.end:.3f}s {'copy' if seg.copy else 'encode'}"
+                    for seg in segments
+                )
+            )
+
+            started = time_module.monotonic()
+            staging_path = self.export_cache.staging_path(cache_key, output_filename)
+            try:
+                await self._write_segments(
+                    source_path, segments, staging_path, codec, on_progress, nice
+                )
+            except BaseException:
+                self.export_cache.discard(staging_path)
+                raise
+            output_path = self.export_cache.commit(cache_key, staging_path)
+            
+            logger.info(
+                f"Exported subclip: {output_filename} "
+                f"in {time_module.monotonic() - started:.2f}s"
+            )
             return output_path
             
         except Exception as e:
@@ -226,10 +505,131 @@ class FileService:
             logger.error(f"Error exporting subclip from {filename}")
             return None
     
+    def export_filename(self, video_file: VideoFile, start_seconds: float, end_seconds: float, mode: ExportMode) -> str:
+        """Download name of an export: Scheinbar_YY-MM-DD_HH-MM-{start_seconds}-{end_seconds}[-mode].mp4"""
+        # Using the start time of the subclip, with seconds for uniqueness
+        start_datetime = video_file.start_time + timedelta(seconds=start_seconds)
+        mode_suffix = "" if mode == "fast" else f"-{mode}"
+        return f"Scheinbar_{start_datetime.strftime('%y-%m-%d_%H-%M')}-{int(start_seconds)}-{int(end_seconds)}{mode_suffix}.mp4"
+
+    async def stream_subclip(
+        self,
+        filename: str,
+        start_seconds: float,
+        end_seconds: float,
+        mode: ExportMode = "fast",
+        nice: int = 0
+    ) -> AsyncIterator[bytes]:
+        """
+        Export a subclip as fragmented MP4 chunks without writing to disk
+
+        Args:
+            filename: Source video filename
+            start_seconds: Start of the clip in seconds
+            end_seconds: End of the clip in seconds
+            mode: "fast" or "exact" ("smart" needs intermediate files)
+            nice: CPU priority of the ffmpeg process
+
+        Raises:
+            ValueError: mode is not streamable
+            FFmpegError: ffmpeg failed
+        """
+        if mode == "smart":
+            raise ValueError("smart exports cannot be streamed")
+
+        index = await self.get_keyframe_index(filename) if mode == "fast" else None
+        segment = plan_segments(mode, start_seconds, end_seconds, index)[0]
+        logger.info(
+            f"Streaming export of {filename} ({mode}): "
+            f"{segment.start:.3f}-{segment.end:.3f}s"
+        )
+
+        started = time_module.monotonic()
+        sent = 0
+        async for chunk in self.ffmpeg.stream(
+            stream_command(self.get_video_path(filename), segment), nice=nice
+        ):
+            sent += len(chunk)
+            yield chunk
+
+        logger.info(
+            f"Streamed export of {filename}: {sent / 1024 ** 2:.1f} MiB "
+            f"in {time_module.monotonic() - started:.2f}s"
+        )
+
+    async def _write_segments(
+        self,
+        source_path: str,
+        segments: List[Segment],
+        output_path: str,
+        codec: Optional[str],
+        on_progress: Optional[Callable[[float], None]] = None,
+        nice: int = 0
+    ):
+        """Run ffmpeg for the planned segments and join them into output_path"""
+        try:
+            await self._run_segments(source_path, segments, output_path, codec, on_progress, nice)
+        except BaseException:
+            # Failed or cancelled: don't leave a truncated export behind
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+
+    async def _run_segments(
+        self,
+        source_path: str,
+        segments: List[Segment],
+        output_path: str,
+        codec: Optional[str],
+        on_progress: Optional[Callable[[float], None]],
+        nice: int
+    ):
+        total = sum(segment.end - segment.start for segment in segments) or 1.0
+
+        def progress_from(offset: float):
+            if on_progress is None:
+                return None
+
+            def report(progress: FFmpegProgress):
+                on_progress(min(1.0, (offset + progress.out_time) / total))
+            return report
+
+        if len(segments) == 1:
+            await self.ffmpeg.run(
+                segment_command(source_path, segments[0], output_path), progress_from(0.0), nice=nice
+            )
+            return
+
+        # Pieces go to MPEG-TS (parameter sets in-band) so re-encoded edges
+        # and copied middle can be joined without re-encoding
+        work_dir = tempfile.mkdtemp(prefix=".export-", dir=self.video_directory)
+        try:
+            list_path = os.path.join(work_dir, "segments.txt")
+            pieces = []
+            offset = 0.0
+            for i, segment in enumerate(segments):
+                piece = os.path.join(work_dir, f"{i:02d}.ts")
+                await self.ffmpeg.run(
+                    segment_command(source_path, segment, piece, codec, container="mpegts"),
+                    progress_from(offset),
+                    nice=nice
+                )
+                pieces.append(piece)
+                offset += segment.end - segment.start
+
+            # The concat demuxer resolves entries relative to the list file
+            with open(list_path, "w") as f:
+                f.writelines(f"file '{os.path.basename(piece)}'\n" for piece in pieces)
+
+            await self.ffmpeg.run(concat_command(list_path, output_path), nice=nice)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
     async def get_frame_at_time(
         self,
         filename: str,
-        timestamp: time
+        timestamp: time,
+        seek: SeekMode = "exact"
     ) -> Optional[str]:
         """
         Get a frame from a video at a specific time as base64
@@ -237,6 +637,8 @@ class FileService:
         Args:
             filename: Video filename
             timestamp: Time in the video
+            seek: "keyframe" returns the keyframe at or before the time
+                (cheap, for scrubbing), "exact" decodes up to the time
         
         Returns:
             Base64 encoded image string or None
@@ -260,20 +662,217 @@ class FileService:
                 return None
             
             # Extract frame
-            video_path = self.get_video_path(filename)
-            frame_base64 = await self._extract_frame_base64(video_path, timestamp_seconds)
-            
-            return frame_base64
+            timestamp_seconds = await self.resolve_frame_time(filename, timestamp_seconds, seek)
+            jpeg = await self.get_frame_image(filename, timestamp_seconds)
+            if jpeg is None:
+                return None
+
+            # Encode as base64
+            img_base64 = base64.b64encode(jpeg).decode("utf-8")
+            return f"data:image/jpg;base64,{img_base64}"
             
         except Exception as e:
             logger.exception(e)
             logger.error(f"Error getting frame from {filename}")
             return None
     
+    async def resolve_frame_time(self, filename: str, seconds: float, seek: SeekMode = "exact") -> float:
+        """
+        Map a requested timestamp to the timestamp that is actually rendered
+
+        Exact requests are quantized to frame_step seconds, keyframe requests
+        snap to the keyframe at or before the time, so nearby requests share
+        one frame (and one ETag).
+        """
+        if seek == "keyframe":
+            index = await self.get_keyframe_index(filename)
+            if index:
+                return round(index.keyframe_before(seconds), 3)
+
+        return self._quantize(seconds)
+
+    async def get_frame_image(
+        self,
+        filename: str,
+        seconds: float,
+        spec: FrameSpec = DEFAULT_FRAME_SPEC
+    ) -> Optional[bytes]:
+        """
+        Render the frame at a timestamp (seconds from video start) as an image
+
+        Frames are served from the frame cache when possible; after a miss
+        the neighboring steps are prefetched in the background.
+
+        Args:
+            filename: Video filename
+            seconds: Timestamp as returned by resolve_frame_time
+            spec: Output bounds, quality and format
+
+        Returns:
+            Encoded image bytes or None
+        """
+        try:
+            video_file = self.get_file(filename)
+            if seconds < 0 or not video_file:
+                return None
+
+            key = self._frame_key(filename, seconds, spec)
+            image = self.frame_cache.get(key)
+            if image is not None:
+                return image
+
+            video_path = self.get_video_path(filename)
+            index = await self.get_keyframe_index(filename)
+            keyframe = index.keyframe_before(seconds) if index else None
+            image = await asyncio.to_thread(self._render_frame, video_path, seconds, keyframe, spec)
+            if image is None:
+                return None
+
+            self.frame_cache.put(key, image)
+            self._prefetch_neighbors(video_file, seconds, index, spec)
+            return image
+        except Exception as e:
+            logger.exception(e)
+            logger.error(f"Error getting frame from {filename}")
+            return None
+
+    async def iter_frames(
+        self,
+        filename: str,
+        timestamps: Iterable[float],
+        spec: FrameSpec = DEFAULT_FRAME_SPEC
+    ) -> AsyncIterator[Tuple[float, bytes]]:
+        """
+        Render several frames of one video in a single pass
+
+        Timestamps are quantized, de-duplicated and sorted so they are decoded
+        in ascending order on the video's pooled decoder: frames within a GOP
+        are reached by decoding forward, later GOPs by one seek to their
+        keyframe. Frames that cannot be decoded are skipped.
+
+        Args:
+            filename: Video filename
+            timestamps: Timestamps in seconds from video start
+            spec: Output bounds, quality and format
+
+        Yields:
+            Tuples of (rendered timestamp, encoded image bytes)
+        """
+        if not self.get_file(filename):
+            return
+
+        video_path = self.get_video_path(filename)
+        index = await self.get_keyframe_index(filename)
+
+        for seconds in sorted({self._quantize(t) for t in timestamps if t >= 0}):
+            key = self._frame_key(filename, seconds, spec)
+            image = self.frame_cache.get(key)
+            if image is None:
+                keyframe = index.keyframe_before(seconds) if index else None
+                image = await asyncio.to_thread(self._render_frame, video_path, seconds, keyframe, spec)
+                if image is None:
+                    logger.debug(f"No frame at {seconds:.3f}s in {filename}")
+                    continue
+                self.frame_cache.put(key, image)
+            yield seconds, image
+
+    def _quantize(self, seconds: float) -> float:
+        return round(round(seconds / self.frame_step) * self.frame_step, 3)
+
+    def _frame_key(self, filename: str, seconds: float, spec: FrameSpec) -> tuple:
+        return (filename, round(seconds, 3), *spec)
+
+    def _prefetch_neighbors(
+        self,
+        video_file: VideoFile,
+        seconds: float,
+        index: Optional[KeyframeIndex],
+        spec: FrameSpec
+    ):
+        """Queue the next/previous quantization steps for background rendering"""
+        duration = video_file.duration.total_seconds() if video_file.duration else None
+        video_path = self.get_video_path(video_file.filename)
+
+        for distance in range(1, self.frame_prefetch + 1):
+            # Forward first: the decoder is positioned right behind the current frame
+            for neighbor in (seconds + distance * self.frame_step, seconds - distance * self.frame_step):
+                neighbor = self._quantize(neighbor)
+                if neighbor < 0 or (duration is not None and neighbor >= duration):
+                    continue
+                keyframe = index.keyframe_before(neighbor) if index else None
+                self.frame_cache.prefetch(
+                    self._frame_key(video_file.filename, neighbor, spec),
+                    lambda t=neighbor, k=keyframe: self._render_frame(video_path, t, k, spec)
+                )
+
     async def calculate_video_duration(self, filename: str) -> Optional[float]:
         """Calculate duration of a video file in seconds"""
+        _, duration = await self.get_video_stats(filename)
+        return duration
+
+    async def get_video_stats(self, filename: str) -> Tuple[int, Optional[float]]:
+        """
+        Get size and duration of a video file
+
+        The duration is cached on (path, size, mtime, inode), so repeated
+        calls only stat the file and re-probe once it has changed.
+
+        Returns:
+            Tuple of (size in bytes, duration in seconds or None)
+        """
+        return await asyncio.to_thread(self._get_video_stats, filename)
+
+    def _get_video_stats(self, filename: str) -> Tuple[int, Optional[float]]:
+        """Blocking part of get_video_stats"""
+        video_path = self.get_video_path(filename)
+        try:
+            stat_result = os.stat(video_path)
+        except OSError:
+            return 0, None
+
+        def compute() -> Optional[float]:
+            stored = self._get_stored_media(filename, stat_result.st_size)
+            if stored and stored.duration:
+                return stored.duration
+            return self._probe_duration(video_path)
+
+        duration = self.media_cache.get_or_compute(video_path, file_identity(stat_result), compute)
+        return stat_result.st_size, duration
+
+    def _get_stored_media(self, filename: str, size: int) -> Optional[StoredMedia]:
+        """Saved probe results, if they were taken of a file of this size"""
+        stored = self._stored_media.get(filename)
+        return stored if stored and stored.size == size else None
+
+    async def get_media_info(self, filename: str) -> Optional[MediaInfo]:
+        """Read container metadata of a video file without decoding"""
+        return await asyncio.to_thread(probe_media, self.get_video_path(filename))
+
+    async def get_codec(self, filename: str) -> Optional[str]:
+        """Video codec of a recording, from the metadata store if it is still valid"""
+        video_path = self.get_video_path(filename)
+        try:
+            size = os.path.getsize(video_path)
+        except OSError:
+            return None
+        stored = self._get_stored_media(filename, size)
+        if stored and stored.codec:
+            return stored.codec
+        info = await self.get_media_info(filename)
+        return info.codec if info else None
+
+    def _probe_duration(self, video_path: str) -> Optional[float]:
+        """Read the duration of a video file in seconds (blocking)"""
+        # Container headers first; they need no demuxer or decoder
+        info = probe_media(video_path)
+        if info and info.duration > 0:
+            return info.duration
+
+        return self._probe_duration_cv2(video_path)
+
+    def _probe_duration_cv2(self, video_path: str) -> Optional[float]:
+        """Read the duration of a video file through cv2 (blocking, slow)"""
         try:
-            video_path = self.get_video_path(filename)
             if not os.path.exists(video_path):
                 return None
             
@@ -291,9 +890,156 @@ class FileService:
             
         except Exception as e:
             logger.exception(e)
-            logger.error(f"Error calculating duration for {filename}")
+            logger.error(f"Error calculating duration for {video_path}")
             return None
     
+    async def get_keyframe_index(self, filename: str) -> Optional[KeyframeIndex]:
+        """
+        Get the keyframe index of a recording
+
+        Loaded from {filename}.keyframes.json or built from the container on
+        first access; concurrent callers share one build.
+
+        Returns:
+            KeyframeIndex or None if the file has no readable index (yet)
+        """
+        try:
+            # Shield so one cancelled request doesn't abort the shared build
+            return await asyncio.shield(self._keyframe_build_task(filename))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return None
+
+    def schedule_keyframe_index(self, filename: str):
+        """Build the keyframe index of a finished recording in the background"""
+        self._keyframe_build_task(filename)
+
+    def _keyframe_build_task(self, filename: str) -> asyncio.Task:
+        """Get the running index build for a recording or start one"""
+        task = self._keyframe_builds.get(filename)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(self._get_keyframe_index, filename))
+            self._keyframe_builds[filename] = task
+            task.add_done_callback(lambda t: self._keyframe_build_done(filename, t))
+        return task
+
+    def _keyframe_build_done(self, filename: str, task: asyncio.Task):
+        self._keyframe_builds.pop(filename, None)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error building keyframe index for {filename}: {task.exception()}")
+
+    def _get_keyframe_index(self, filename: str) -> Optional[KeyframeIndex]:
+        """Blocking part of get_keyframe_index"""
+        video_path = self.get_video_path(filename)
+        try:
+            identity = file_identity(os.stat(video_path))
+        except OSError:
+            return None
+
+        return self.keyframe_cache.get_or_compute(
+            video_path,
+            identity,
+            lambda: self._load_or_build_keyframe_index(filename, identity)
+        )
+
+    def _load_or_build_keyframe_index(self, filename: str, identity) -> Optional[KeyframeIndex]:
+        index_path = self.get_keyframe_index_path(filename)
+        index = KeyframeIndex.load(index_path)
+        if index is not None and index.identity == identity:
+            return index
+
+        started = time_module.monotonic()
+        index = KeyframeIndex.build(self.get_video_path(filename), identity)
+        if index is None:
+            # Still recording (no moov yet) or unreadable; retried once the file changes
+            return None
+
+        index.save(index_path)
+        logger.info(
+            f"Built keyframe index for {filename}: {len(index)} keyframes "
+            f"in {time_module.monotonic() - started:.2f}s"
+        )
+        return index
+
+    def has_sprite_sheet(self, filename: str) -> bool:
+        """Check if the sprite sheet of a video has been generated"""
+        return os.path.exists(self.get_sprite_paths(filename)[1])
+
+    def schedule_sprite_sheet(self, filename: str):
+        """
+        Generate the sprite sheet of a finished recording in the background
+
+        A build that failed is only retried once the file has changed.
+        """
+        if filename in self._sprite_builds:
+            return
+        failed = self._sprite_failures.get(filename)
+        if failed is not None:
+            try:
+                if file_identity(os.stat(self.get_video_path(filename))) == failed:
+                    return
+            except OSError:
+                return
+            del self._sprite_failures[filename]
+        task = asyncio.create_task(self.build_sprite_sheet(filename))
+        self._sprite_builds[filename] = task
+        task.add_done_callback(lambda _: self._sprite_builds.pop(filename, None))
+
+    async def build_sprite_sheet(self, filename: str) -> Optional[dict]:
+        """
+        Generate {filename}.sprite.jpg and {filename}.sprite.json
+
+        Tiles are taken every sprite_interval seconds from the keyframe
+        index, so only keyframes are decoded.
+
+        Returns:
+            The sprite manifest or None
+        """
+        video_file = self.get_file(filename)
+        if not video_file or video_file.is_recording:
+            return None
+
+        manifest = None
+        try:
+            identity = file_identity(os.stat(self.get_video_path(filename)))
+        except OSError:
+            return None
+
+        try:
+            index = await self.get_keyframe_index(filename)
+            _, duration = await self.get_video_stats(filename)
+            if not duration:
+                self._sprite_failures[filename] = identity
+                return None
+
+            image_path, manifest_path = self.get_sprite_paths(filename)
+            started = time_module.monotonic()
+            manifest = await asyncio.to_thread(
+                build_sprite_sheet,
+                self.get_video_path(filename),
+                image_path,
+                manifest_path,
+                duration,
+                interval=self.sprite_interval,
+                tile_width=self.sprite_tile_width,
+                columns=self.sprite_columns,
+                index=index
+            )
+            if manifest:
+                logger.info(
+                    f"Built sprite sheet for {filename}: {len(manifest['times'])} tiles "
+                    f"in {time_module.monotonic() - started:.2f}s"
+                )
+
+        except Exception as e:
+            logger.exception(e)
+            logger.error(f"Error building sprite sheet for {filename}")
+
+        if manifest is None:
+            self._sprite_failures[filename] = identity
+        return manifest
+
     def get_video_path(self, filename: str) -> str:
         """Get full path to a video file"""
         return os.path.join(self.video_directory, f"{filename}.mp4")
@@ -302,55 +1048,33 @@ class FileService:
         """Get full path to a video JSON metadata file"""
         return os.path.join(self.video_directory, f"{filename}.json")
     
+    def get_keyframe_index_path(self, filename: str) -> str:
+        """Get full path to the persisted keyframe index of a video"""
+        return os.path.join(self.video_directory, f"{filename}.keyframes.json")
+    
+    def get_sprite_paths(self, filename: str) -> Tuple[str, str]:
+        """Get full paths to the sprite sheet image and its manifest"""
+        return (
+            os.path.join(self.video_directory, f"{filename}.sprite.jpg"),
+            os.path.join(self.video_directory, f"{filename}.sprite.json")
+        )
+    
     def video_exists(self, filename: str) -> bool:
         """Check if a video file exists"""
         return os.path.exists(self.get_video_path(filename))
     
-    async def _extract_frame_base64(
+    def _render_frame(
         self,
         video_path: str,
-        timestamp_seconds: float
-    ) -> Optional[str]:
-        """
-        Internal method to extract a frame and encode as base64
-        
-        Args:
-            video_path: Path to video file
-            timestamp_seconds: Timestamp in seconds
-        
-        Returns:
-            Base64 encoded JPEG image
-        """
-        try:
-            # Open video with cv2
-            cap = cv2.VideoCapture(video_path)
-            
-            # Set position to timestamp
-            cap.set(cv2.CAP_PROP_POS_MSEC, timestamp_seconds * 1000)
-            
-            # Read frame
-            ret, frame = cap.read()
-            cap.release()
-            
-            if not ret:
-                return None
-            
-            # Convert color space and resize
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = cv2.resize(frame, (800, 450))
-            
-            # Convert to PIL Image and encode as JPEG
-            img = Image.fromarray(frame, 'RGB')
-            buff = BytesIO()
-            img.save(buff, format="JPEG")
-            
-            # Encode as base64
-            img_base64 = base64.b64encode(buff.getvalue()).decode("utf-8")
-            return f"data:image/jpg;base64,{img_base64}"
-            
-        except Exception as e:
-            logger.error(f"Error extracting frame: {e}")
+        timestamp_seconds: float,
+        keyframe: Optional[float] = None,
+        spec: FrameSpec = DEFAULT_FRAME_SPEC
+    ) -> Optional[bytes]:
+        """Decode a frame through the decoder pool and encode it (blocking)"""
+        frame = self.decoder_pool.read_frame(video_path, timestamp_seconds, keyframe)
+        if frame is None:
             return None
+        return self.frame_pipeline.encode(frame, spec)
     
     def get_filesize(self, filepath: str) -> int:
         """Get file size in bytes"""
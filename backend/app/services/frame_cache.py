@@ -0,0 +1,154 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Queued prefetches beyond this are dropped; scrubbing moves on quickly
+_MAX_PENDING_PREFETCH = 16
+_PREFETCH_NICENESS = 10
+
+FrameKey = Tuple[Hashable, ...]  # (video, quantized seconds, width, height, ...)
+
+
+def _lower_thread_priority():
+    """Run prefetch work with a lower scheduling priority (Linux: per thread)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), _PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+class FrameCache:
+    """
+    Byte-bounded LRU cache for encoded preview frames.
+
+    Keys start with the video name, followed by the quantized timestamp and
+    the output parameters. Frames can be prefetched on a single background
+    thread with lowered priority; prefetches that are already cached or
+    queued are skipped and the queue is bounded.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[FrameKey, Tuple[bytes, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._pending: Set[FrameKey] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+        self.prefetch_hits = 0
+
+    def get(self, key: FrameKey) -> Optional[bytes]:
+        """Get an encoded frame (counts as hit or miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            data, prefetched = entry
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if prefetched:
+                self.prefetch_hits += 1
+                self._entries[key] = (data, False)
+            return data
+
+    def put(self, key: FrameKey, data: bytes, prefetched: bool = False):
+        """Store an encoded frame, evicting least recently used frames"""
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+
+            self._entries[key] = (data, prefetched)
+            self._bytes += len(data)
+
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def __contains__(self, key: FrameKey) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def invalidate(self, video: str):
+        """Drop all frames of a video"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == video]:
+                self._bytes -= len(self._entries.pop(key)[0])
+
+    def prefetch(self, key: FrameKey, render: Callable[[], Optional[bytes]]):
+        """Render and store a frame in the background unless it is cached or queued"""
+        if self.max_bytes == 0:
+            return
+
+        with self._lock:
+            if key in self._entries or key in self._pending:
+                return
+            if len(self._pending) >= _MAX_PENDING_PREFETCH:
+                return
+            self._pending.add(key)
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix="frame-prefetch",
+                    initializer=_lower_thread_priority
+                )
+            executor = self._executor
+
+        executor.submit(self._run_prefetch, key, render)
+
+    def close(self):
+        """Stop the prefetch worker; queued prefetches are discarded"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters and memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "prefetched": self.prefetched,
+                "prefetch_hits": self.prefetch_hits,
+                "pending_prefetch": len(self._pending)
+            }
+
+    def _run_prefetch(self, key: FrameKey, render: Callable[[], Optional[bytes]]):
+        try:
+            with self._lock:
+                if key in self._entries:
+                    return
+            data = render()
+            if data is not None:
+                self.put(key, data, prefetched=True)
+                with self._lock:
+                    self.prefetched += 1
+        except Exception as e:
+            logger.debug(f"Frame prefetch failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
@@ -0,0 +1,89 @@
+import threading
+from typing import Dict, Literal, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FrameFormat = Literal["jpeg", "webp"]
+
+_ENCODINGS = {
+    # format: (imencode extension, quality flag, media type)
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, "image/jpeg"),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, "image/webp")
+}
+
+# Resize buffers kept per thread (one per output shape)
+_MAX_BUFFERS_PER_THREAD = 4
+
+
+class FrameSpec(NamedTuple):
+    """Output parameters of a rendered frame"""
+    width: int = 800
+    height: int = 450
+    quality: int = 75
+    format: FrameFormat = "jpeg"
+
+    @property
+    def media_type(self) -> str:
+        return _ENCODINGS[self.format][2]
+
+
+DEFAULT_FRAME_SPEC = FrameSpec()
+
+
+def fit_size(width: int, height: int, max_width: int, max_height: int) -> Tuple[int, int]:
+    """
+    Largest size with the source aspect ratio that fits into the bounds
+
+    Never upscales; a source that already fits is returned unchanged.
+    """
+    scale = min(max_width / width, max_height / height, 1.0)
+    if scale >= 1.0:
+        return width, height
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+class FramePipeline:
+    """
+    Resizes and encodes decoded frames.
+
+    Works directly on the decoder's BGR layout (no color conversion and no
+    PIL round-trip), skips resizing when the frame already fits and resizes
+    into preallocated per-thread buffers. Thread-safe.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def encode(self, frame: np.ndarray, spec: FrameSpec = DEFAULT_FRAME_SPEC) -> Optional[bytes]:
+        """Fit the frame into the spec's bounds and encode it"""
+        height, width = frame.shape[:2]
+        target = fit_size(width, height, spec.width, spec.height)
+
+        if target != (width, height):
+            frame = cv2.resize(
+                frame,
+                target,
+                dst=self._buffer(target, frame.shape[2:], frame.dtype),
+                # INTER_AREA looks marginally better but costs ~3x the time
+                interpolation=cv2.INTER_LINEAR
+            )
+
+        extension, quality_flag, _ = _ENCODINGS[spec.format]
+        ok, encoded = cv2.imencode(extension, frame, [quality_flag, spec.quality])
+        if not ok:
+            return None
+        return encoded.tobytes()
+
+    def _buffer(self, size: Tuple[int, int], channels: tuple, dtype) -> np.ndarray:
+        buffers: Dict[tuple, np.ndarray] = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+
+        shape = (size[1], size[0], *channels)
+        buffer = buffers.get(shape)
+        if buffer is None or buffer.dtype != dtype:
+            if len(buffers) >= _MAX_BUFFERS_PER_THREAD:
+                buffers.pop(next(iter(buffers)))
+            buffer = buffers[shape] = np.empty(shape, dtype=dtype)
+        return buffer
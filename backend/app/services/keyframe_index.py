@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, Optional, Tuple
+
+from app.services.media_cache import FileIdentity
+from app.services.media_probe import read_keyframes
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_VERSION = 1
+
+
+class CutPlan(NamedTuple):
+    """Cut points of an export, snapped to the keyframe index"""
+    start: float
+    end: float
+    requested_start: float
+
+    @property
+    def lead_in(self) -> float:
+        """Seconds between the keyframe and the requested start"""
+        return self.requested_start - self.start
+
+
+class KeyframeIndex:
+    """
+    Keyframe table of one recording.
+
+    Maps keyframe timestamps (seconds) to byte offsets and sample numbers;
+    the position of a keyframe in the table is its GOP number. Stored as
+    compact arrays and persisted next to the recording as
+    {filename}.keyframes.json together with the identity of the file
+    version it was built from.
+    """
+
+    def __init__(self, times, offsets, samples=None, identity: Optional[FileIdentity] = None):
+        self.times = array("d", times)
+        self.offsets = array("q", offsets)
+        # Sample numbers are only known for MP4; -1 marks unknown
+        self.samples = array("q", samples if samples is not None else [-1] * len(self.times))
+        self.identity = tuple(identity) if identity is not None else None
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def build(cls, video_path: str, identity: FileIdentity) -> Optional["KeyframeIndex"]:
+        """Build the index from the container's sample tables or cues (blocking)"""
+        keyframes = read_keyframes(video_path)
+        if not keyframes:
+            return None
+
+        times, offsets, samples = zip(*keyframes)
+        return cls(times, offsets, [-1 if s is None else s for s in samples], identity)
+
+    @classmethod
+    def load(cls, index_path: str) -> Optional["KeyframeIndex"]:
+        """Load a persisted index; returns None if it is missing or unreadable"""
+        try:
+            with open(index_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != _FORMAT_VERSION:
+                return None
+            return cls(data["times"], data["offsets"], data["samples"], data["identity"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable keyframe index {index_path}: {e}")
+            return None
+
+    def save(self, index_path: str):
+        """Persist the index atomically"""
+        data = {
+            "version": _FORMAT_VERSION,
+            "identity": list(self.identity) if self.identity else None,
+            "times": [round(t, 6) for t in self.times],
+            "offsets": self.offsets.tolist(),
+            "samples": self.samples.tolist()
+        }
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+
+    def gop_of(self, seconds: float) -> int:
+        """Number of the GOP containing the timestamp"""
+        return max(0, bisect_right(self.times, seconds) - 1)
+
+    def gop_bounds(self, seconds: float) -> Tuple[float, Optional[float]]:
+        """Start and end (None for the last GOP) of the GOP containing the timestamp"""
+        gop = self.gop_of(seconds)
+        end = self.times[gop + 1] if gop + 1 < len(self.times) else None
+        return self.times[gop], end
+
+    def keyframe_before(self, seconds: float) -> float:
+        """Timestamp of the last keyframe at or before the given time"""
+        return self.times[self.gop_of(seconds)]
+
+    def keyframe_after(self, seconds: float) -> Optional[float]:
+        """Timestamp of the first keyframe at or after the given time"""
+        position = bisect_left(self.times, seconds)
+        return self.times[position] if position < len(self.times) else None
+
+    def offset_of(self, seconds: float) -> int:
+        """Byte offset of the keyframe that starts the GOP containing the timestamp"""
+        return self.offsets[self.gop_of(seconds)]
+
+    def plan_cut(self, start: float, end: float) -> CutPlan:
+        """
+        Plan a stream-copy cut
+
+        A stream copy can only begin on a keyframe, so the start is moved
+        back to the keyframe of its GOP; the end is kept.
+
+        Args:
+            start: Requested start in seconds
+            end: Requested end in seconds
+
+        Returns:
+            CutPlan with the effective start and end
+        """
+        return CutPlan(start=self.keyframe_before(start), end=end, requested_start=start)
@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+
+FileIdentity = Tuple[int, int, int]  # (size, mtime_ns, inode)
+
+
+def file_identity(stat_result: os.stat_result) -> FileIdentity:
+    """Identity of a file version; changes whenever the file is rewritten or grows"""
+    return (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino)
+
+
+class MediaInfoCache:
+    """
+    Thread-safe LRU cache for per-file probe results.
+
+    Entries are stored per path together with the file identity they were
+    computed for. A lookup with a different identity (file grew, was
+    replaced, ...) counts as a miss and recomputes the value.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[FileIdentity, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, path: str, identity: FileIdentity, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for this file version or compute and store it (blocking)"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == identity:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Compute outside the lock so slow probes don't serialize other lookups
+        value = compute()
+
+        with self._lock:
+            self._entries[path] = (identity, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return value
+
+    def invalidate(self, path: str):
+        """Drop the entry for a path"""
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None
+            }
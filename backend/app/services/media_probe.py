@@ -0,0 +1,472 @@
+"""
+Lightweight container probe for recordings.
+
+Reads duration, resolution, frame rate, codec and keyframe count straight
+from the container headers (MP4 `moov` boxes or Matroska `Info`/`Tracks`/
+`Cues` elements) through a read-only mmap. No demuxer or decoder is
+created, and only the header pages are touched, so probing a multi-hour
+recording costs a few page faults instead of opening it with cv2.
+"""
+
+import os
+import mmap
+import struct
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from app.models.video import MediaInfo
+
+logger = logging.getLogger(__name__)
+
+# (timestamp in seconds, byte offset, sample number)
+Keyframe = Tuple[float, int, Optional[int]]
+
+
+_CODEC_NAMES = {
+    "avc1": "h264",
+    "avc3": "h264",
+    "hvc1": "hevc",
+    "hev1": "hevc",
+    "av01": "av1",
+    "vp09": "vp9",
+    "mp4v": "mpeg4",
+    "V_MPEG4/ISO/AVC": "h264",
+    "V_MPEG4/ISO/ASP": "mpeg4",
+    "V_MPEGH/ISO/HEVC": "hevc",
+    "V_AV1": "av1",
+    "V_VP9": "vp9",
+    "V_VP8": "vp8",
+}
+
+
+def probe_media(path: str) -> Optional[MediaInfo]:
+    """
+    Probe a video container without decoding
+
+    Args:
+        path: Path to an MP4/MOV or Matroska file
+
+    Returns:
+        MediaInfo, or None if the file is missing, incomplete (e.g. the
+        moov box of a running recording has not been written yet) or
+        cannot be parsed
+    """
+    try:
+        if not os.path.exists(path) or os.path.getsize(path) < 16:
+            return None
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] == b"\x1a\x45\xdf\xa3":
+                return _probe_matroska(buf)
+            return _probe_mp4(buf)
+
+    except Exception as e:
+        logger.debug(f"Could not probe {path}: {e}")
+        return None
+
+
+def read_keyframes(path: str) -> Optional[List[Keyframe]]:
+    """
+    Read the keyframe (sync sample) table of the video track
+
+    Args:
+        path: Path to an MP4/MOV or Matroska file
+
+    Returns:
+        List of (timestamp seconds, byte offset, sample number) sorted by
+        time, or None if the container has no usable index. Matroska cues
+        carry no sample numbers; the cluster offset is returned instead and
+        the sample number is None.
+    """
+    try:
+        if not os.path.exists(path) or os.path.getsize(path) < 16:
+            return None
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] == b"\x1a\x45\xdf\xa3":
+                return _matroska_keyframes(buf)
+            return _mp4_keyframes(buf)
+
+    except Exception as e:
+        logger.debug(f"Could not read keyframes of {path}: {e}")
+        return None
+
+
+def normalize_codec(codec: Optional[str]) -> Optional[str]:
+    """Map container codec identifiers to short codec names"""
+    if not codec:
+        return None
+    return _CODEC_NAMES.get(codec, codec.lower())
+
+
+# MP4 / ISO BMFF
+
+def _iter_boxes(buf, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload start, box end) for all boxes in [start, end)"""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            # Truncated box (file still being written)
+            return
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _find_box(buf, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    """Find the first child box of the given type"""
+    for child_type, payload, box_end in _iter_boxes(buf, start, end):
+        if child_type == box_type:
+            return payload, box_end
+    return None
+
+
+def _find_path(buf, start: int, end: int, *path: bytes) -> Optional[Tuple[int, int]]:
+    """Find a nested box, e.g. _find_path(buf, s, e, b"mdia", b"minf", b"stbl")"""
+    span = (start, end)
+    for box_type in path:
+        span = _find_box(buf, span[0], span[1], box_type)
+        if span is None:
+            return None
+    return span
+
+
+def _read_timescale_duration(buf, payload: int) -> Tuple[int, int]:
+    """Read timescale and duration from an mvhd or mdhd payload"""
+    version = buf[payload]
+    if version == 1:
+        return struct.unpack_from(">IQ", buf, payload + 4 + 16)
+    return struct.unpack_from(">II", buf, payload + 4 + 8)
+
+
+def _read_table(buf, box: Tuple[int, int], fmt: str) -> list:
+    """Read the entries of a full box laid out as (version/flags, entry_count, entries...)"""
+    entry_count = struct.unpack_from(">I", buf, box[0] + 4)[0]
+    return list(struct.iter_unpack(fmt, buf[box[0] + 8:box[0] + 8 + entry_count * struct.calcsize(fmt)]))
+
+
+def _find_video_track(buf, moov: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+    """Find the first trak box with a video handler"""
+    for box_type, trak_start, trak_end in _iter_boxes(buf, moov[0], moov[1]):
+        if box_type != b"trak":
+            continue
+        hdlr = _find_path(buf, trak_start, trak_end, b"mdia", b"hdlr")
+        if hdlr is not None and buf[hdlr[0] + 8:hdlr[0] + 12] == b"vide":
+            return trak_start, trak_end
+    return None
+
+
+def _probe_mp4(buf) -> Optional[MediaInfo]:
+    moov = _find_box(buf, 0, len(buf), b"moov")
+    if moov is None:
+        return None
+
+    mvhd = _find_box(buf, moov[0], moov[1], b"mvhd")
+    if mvhd is None:
+        return None
+    timescale, duration = _read_timescale_duration(buf, mvhd[0])
+    if not timescale or not duration:
+        return None
+
+    info = MediaInfo(duration=duration / timescale)
+
+    trak = _find_video_track(buf, moov)
+    if trak is None:
+        return info
+    trak_start, trak_end = trak
+
+    tkhd = _find_box(buf, trak_start, trak_end, b"tkhd")
+    if tkhd is not None:
+        offset = 84 if buf[tkhd[0]] == 1 else 72
+        width, height = struct.unpack_from(">II", buf, tkhd[0] + 4 + offset)
+        info.width = width >> 16
+        info.height = height >> 16
+
+    mdhd = _find_path(buf, trak_start, trak_end, b"mdia", b"mdhd")
+    stbl = _find_path(buf, trak_start, trak_end, b"mdia", b"minf", b"stbl")
+    if stbl is None:
+        return info
+
+    stsd = _find_box(buf, stbl[0], stbl[1], b"stsd")
+    if stsd is not None:
+        info.codec = normalize_codec(buf[stsd[0] + 12:stsd[0] + 16].decode("ascii", "replace"))
+
+    stts = _find_box(buf, stbl[0], stbl[1], b"stts")
+    if stts is not None and mdhd is not None:
+        track_timescale, _ = _read_timescale_duration(buf, mdhd[0])
+        samples = 0
+        ticks = 0
+        for count, delta in _read_table(buf, stts, ">II"):
+            samples += count
+            ticks += count * delta
+        if ticks and track_timescale:
+            info.fps = round(samples * track_timescale / ticks, 3)
+
+        stss = _find_box(buf, stbl[0], stbl[1], b"stss")
+        # Without stss every sample is a sync sample
+        info.keyframes = struct.unpack_from(">I", buf, stss[0] + 4)[0] if stss else samples
+
+    return info
+
+
+def _mp4_keyframes(buf) -> Optional[List[Keyframe]]:
+    moov = _find_box(buf, 0, len(buf), b"moov")
+    if moov is None:
+        return None
+    trak = _find_video_track(buf, moov)
+    if trak is None:
+        return None
+
+    mdhd = _find_path(buf, trak[0], trak[1], b"mdia", b"mdhd")
+    stbl = _find_path(buf, trak[0], trak[1], b"mdia", b"minf", b"stbl")
+    if mdhd is None or stbl is None:
+        return None
+    timescale, _ = _read_timescale_duration(buf, mdhd[0])
+
+    boxes = {box_type: (payload, end) for box_type, payload, end in _iter_boxes(buf, *stbl)}
+    if b"stts" not in boxes or b"stsc" not in boxes or b"stsz" not in boxes:
+        return None
+
+    stts = _read_table(buf, boxes[b"stts"], ">II")
+    stsc = _read_table(buf, boxes[b"stsc"], ">III")
+    if b"co64" in boxes:
+        chunk_offsets = [offset for offset, in _read_table(buf, boxes[b"co64"], ">Q")]
+    elif b"stco" in boxes:
+        chunk_offsets = [offset for offset, in _read_table(buf, boxes[b"stco"], ">I")]
+    else:
+        return None
+
+    stsz = boxes[b"stsz"][0]
+    uniform_size, sample_count = struct.unpack_from(">II", buf, stsz + 4)
+    sizes = None if uniform_size else struct.unpack_from(f">{sample_count}I", buf, stsz + 12)
+
+    sync_samples = [n for n, in _read_table(buf, boxes[b"stss"], ">I")] if b"stss" in boxes else None
+
+    # Composition offsets shift presentation time (B-frames); normalize so
+    # the first sample is presented at 0 like the decoders report it
+    composition = None
+    if b"ctts" in boxes:
+        signed = buf[boxes[b"ctts"][0]] == 1
+        composition = _read_table(buf, boxes[b"ctts"], ">Ii" if signed else ">II")
+
+    keyframes: List[Keyframe] = []
+    sample = 1
+    dts = 0
+    stts_index, stts_left = 0, stts[0][0] if stts else 0
+    ctts_index, ctts_left = 0, composition[0][0] if composition else 0
+    first_offset = composition[0][1] if composition else 0
+    sync_index = 0
+
+    stsc_index = 0
+
+    for chunk_index, chunk_offset in enumerate(chunk_offsets, start=1):
+        # Find the stsc run covering this chunk (runs are sorted by first chunk)
+        while stsc_index + 1 < len(stsc) and chunk_index >= stsc[stsc_index + 1][0]:
+            stsc_index += 1
+        samples_in_chunk = stsc[stsc_index][1]
+
+        offset = chunk_offset
+        for _ in range(samples_in_chunk):
+            if sample > sample_count:
+                break
+
+            is_sync = sync_samples is None
+            if not is_sync and sync_index < len(sync_samples) and sync_samples[sync_index] == sample:
+                is_sync = True
+                sync_index += 1
+
+            if is_sync:
+                pts = dts + (composition[ctts_index][1] - first_offset if composition else 0)
+                keyframes.append((max(0.0, pts / timescale), offset, sample))
+
+            offset += sizes[sample - 1] if sizes else uniform_size
+            dts += stts[stts_index][1]
+            stts_left -= 1
+            if stts_left == 0 and stts_index + 1 < len(stts):
+                stts_index += 1
+                stts_left = stts[stts_index][0]
+            if composition:
+                ctts_left -= 1
+                if ctts_left == 0 and ctts_index + 1 < len(composition):
+                    ctts_index += 1
+                    ctts_left = composition[ctts_index][0]
+            sample += 1
+
+    return keyframes or None
+
+
+# Matroska / WebM
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_TRACKS = 0x1654AE6B
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_TRACK_NUMBER = 0xD7
+_EBML_TRACK_TYPE = 0x83
+_EBML_CODEC_ID = 0x86
+_EBML_DEFAULT_DURATION = 0x23E383
+_EBML_VIDEO = 0xE0
+_EBML_PIXEL_WIDTH = 0xB0
+_EBML_PIXEL_HEIGHT = 0xBA
+_EBML_CUES = 0x1C53BB6B
+_EBML_CUE_POINT = 0xBB
+_EBML_CUE_TIME = 0xB3
+_EBML_CUE_TRACK_POSITIONS = 0xB7
+_EBML_CUE_TRACK = 0xF7
+_EBML_CUE_CLUSTER_POSITION = 0xF1
+
+
+def _read_vint(buf, pos: int, keep_marker: bool) -> Tuple[int, int, bool]:
+    """Read an EBML variable-length integer; returns (value, length, all_ones)"""
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML vint")
+
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    for i in range(1, length):
+        byte = buf[pos + i]
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return value, length, all_ones
+
+
+def _iter_elements(buf, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (id, payload start, element end) for all elements in [start, end)"""
+    pos = start
+    while pos < end:
+        element_id, id_length, _ = _read_vint(buf, pos, keep_marker=True)
+        size, size_length, unknown = _read_vint(buf, pos + id_length, keep_marker=False)
+        payload = pos + id_length + size_length
+        element_end = end if unknown else min(payload + size, end)
+        yield element_id, payload, element_end
+        if unknown:
+            # Unknown-size element (live recording): nothing after it can be located
+            return
+        pos = element_end
+
+
+def _read_uint(buf, start: int, end: int) -> int:
+    return int.from_bytes(buf[start:end], "big")
+
+
+def _parse_matroska(buf) -> Optional[dict]:
+    """Read Info, the first video TrackEntry and Cues of the first Segment"""
+    segment = None
+    for element_id, payload, element_end in _iter_elements(buf, 0, len(buf)):
+        if element_id == _EBML_SEGMENT:
+            segment = (payload, element_end)
+            break
+    if segment is None:
+        return None
+
+    parsed = {
+        "segment_start": segment[0],
+        "timecode_scale": 1_000_000,
+        "duration": None,
+        "video": {},
+        "cues": None
+    }
+
+    for element_id, payload, element_end in _iter_elements(buf, *segment):
+        if element_id == _EBML_INFO:
+            for child_id, child, child_end in _iter_elements(buf, payload, element_end):
+                if child_id == _EBML_TIMECODE_SCALE:
+                    parsed["timecode_scale"] = _read_uint(buf, child, child_end)
+                elif child_id == _EBML_DURATION:
+                    fmt = ">d" if child_end - child == 8 else ">f"
+                    parsed["duration"] = struct.unpack_from(fmt, buf, child)[0]
+
+        elif element_id == _EBML_TRACKS and not parsed["video"]:
+            for entry_id, entry, entry_end in _iter_elements(buf, payload, element_end):
+                if entry_id != _EBML_TRACK_ENTRY:
+                    continue
+                track = {}
+                for child_id, child, child_end in _iter_elements(buf, entry, entry_end):
+                    if child_id == _EBML_TRACK_NUMBER:
+                        track["number"] = _read_uint(buf, child, child_end)
+                    elif child_id == _EBML_TRACK_TYPE:
+                        track["type"] = _read_uint(buf, child, child_end)
+                    elif child_id == _EBML_CODEC_ID:
+                        track["codec"] = bytes(buf[child:child_end]).rstrip(b"\0").decode("ascii", "replace")
+                    elif child_id == _EBML_DEFAULT_DURATION:
+                        track["frame_ns"] = _read_uint(buf, child, child_end)
+                    elif child_id == _EBML_VIDEO:
+                        for video_id, value, value_end in _iter_elements(buf, child, child_end):
+                            if video_id == _EBML_PIXEL_WIDTH:
+                                track["width"] = _read_uint(buf, value, value_end)
+                            elif video_id == _EBML_PIXEL_HEIGHT:
+                                track["height"] = _read_uint(buf, value, value_end)
+                if track.get("type") == 1:
+                    parsed["video"] = track
+                    break
+
+        elif element_id == _EBML_CUES:
+            cues = []
+            for cue_id, cue, cue_end in _iter_elements(buf, payload, element_end):
+                if cue_id != _EBML_CUE_POINT:
+                    continue
+                cue_time = None
+                for child_id, child, child_end in _iter_elements(buf, cue, cue_end):
+                    if child_id == _EBML_CUE_TIME:
+                        cue_time = _read_uint(buf, child, child_end)
+                    elif child_id == _EBML_CUE_TRACK_POSITIONS:
+                        position = {}
+                        for pos_id, value, value_end in _iter_elements(buf, child, child_end):
+                            if pos_id == _EBML_CUE_TRACK:
+                                position["track"] = _read_uint(buf, value, value_end)
+                            elif pos_id == _EBML_CUE_CLUSTER_POSITION:
+                                position["cluster"] = _read_uint(buf, value, value_end)
+                        if cue_time is not None and "cluster" in position:
+                            cues.append((cue_time, position.get("track"), position["cluster"]))
+            parsed["cues"] = cues
+
+    return parsed
+
+
+def _probe_matroska(buf) -> Optional[MediaInfo]:
+    parsed = _parse_matroska(buf)
+    if parsed is None or not parsed["duration"]:
+        return None
+
+    video = parsed["video"]
+    frame_ns = video.get("frame_ns")
+    cues = parsed["cues"]
+    if cues is not None and "number" in video:
+        cues = [cue for cue in cues if cue[1] in (None, video["number"])]
+
+    return MediaInfo(
+        duration=parsed["duration"] * parsed["timecode_scale"] / 1e9,
+        width=video.get("width"),
+        height=video.get("height"),
+        fps=round(1e9 / frame_ns, 3) if frame_ns else None,
+        codec=normalize_codec(video.get("codec")),
+        keyframes=len(cues) if cues is not None else None
+    )
+
+
+def _matroska_keyframes(buf) -> Optional[List[Keyframe]]:
+    parsed = _parse_matroska(buf)
+    if parsed is None or not parsed["cues"]:
+        return None
+
+    track = parsed["video"].get("number")
+    scale = parsed["timecode_scale"] / 1e9
+    return sorted(
+        (cue_time * scale, parsed["segment_start"] + cluster, None)
+        for cue_time, cue_track, cluster in parsed["cues"]
+        if track is None or cue_track in (None, track)
+    )
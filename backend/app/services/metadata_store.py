@@ -0,0 +1,195 @@
+import os
+import asyncio
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from app.core.timezone import to_utc
+from app.models.video import VideoFile, is_metadata_sidecar
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    filename TEXT PRIMARY KEY,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    size INTEGER,
+    duration REAL,
+    codec TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_start_time ON recordings (start_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO recordings (filename, start_time, end_time, size, duration, codec, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (filename) DO UPDATE SET
+    start_time = excluded.start_time,
+    end_time = excluded.end_time,
+    size = COALESCE(excluded.size, recordings.size),
+    duration = COALESCE(excluded.duration, recordings.duration),
+    codec = COALESCE(excluded.codec, recordings.codec),
+    updated_at = excluded.updated_at
+"""
+
+_JSON_IMPORT_KEY = "json_sidecars_imported"
+
+
+class StoredMedia(NamedTuple):
+    """Probe results saved when a recording stopped"""
+    size: int
+    duration: Optional[float]
+    codec: Optional[str]
+
+
+class MetadataStore:
+    """
+    SQLite (WAL mode) catalog of recording metadata.
+
+    Replaces the per-recording JSON sidecars as the source of truth when
+    enabled. All database access runs in worker threads behind a single
+    connection and lock, so callers on the event loop never block on disk.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def open(self):
+        """Open the database and create the schema"""
+        if self._conn is None:
+            await asyncio.to_thread(self._open)
+
+    async def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            await asyncio.to_thread(self._close)
+
+    async def load_all(self) -> List[VideoFile]:
+        """Load all recordings ordered by start time (single indexed query)"""
+        return await asyncio.to_thread(self._load_all)
+
+    async def load_media(self) -> Dict[str, StoredMedia]:
+        """Saved size, duration and codec of finished recordings by filename"""
+        return await asyncio.to_thread(self._load_media)
+
+    async def upsert(
+        self,
+        video_file: VideoFile,
+        size: Optional[int] = None,
+        duration: Optional[float] = None,
+        codec: Optional[str] = None
+    ):
+        """Insert or update a recording; derived fields are kept if not given"""
+        await asyncio.to_thread(self._upsert, [(video_file, size, duration, codec)])
+
+    async def delete(self, filename: str):
+        """Delete a recording"""
+        await asyncio.to_thread(self._execute, "DELETE FROM recordings WHERE filename = ?", (filename,))
+
+    async def import_json_sidecars(self, directory: str) -> int:
+        """
+        One-time import of the legacy JSON sidecars
+
+        Returns:
+            Number of imported recordings (0 if the import already ran)
+        """
+        return await asyncio.to_thread(self._import_json_sidecars, directory)
+
+    def _open(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        self._conn = conn
+        logger.info(f"Opened metadata store: {self.db_path}")
+
+    def _close(self):
+        with self._lock:
+            self._conn.close()
+            self._conn = None
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def _load_all(self) -> List[VideoFile]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename, start_time, end_time FROM recordings ORDER BY start_time"
+            ).fetchall()
+
+        return [
+            VideoFile(
+                filename=filename,
+                start_time=datetime.fromisoformat(start_time),
+                end_time=datetime.fromisoformat(end_time) if end_time else None
+            )
+            for filename, start_time, end_time in rows
+        ]
+
+    def _load_media(self) -> Dict[str, StoredMedia]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename, size, duration, codec FROM recordings WHERE size IS NOT NULL"
+            ).fetchall()
+        return {filename: StoredMedia(size, duration, codec) for filename, size, duration, codec in rows}
+
+    def _upsert(self, entries: list):
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (
+                video_file.filename,
+                to_utc(video_file.start_time).isoformat(),
+                to_utc(video_file.end_time).isoformat() if video_file.end_time else None,
+                size,
+                duration,
+                codec,
+                now
+            )
+            for video_file, size, duration, codec in entries
+        ]
+        # One transaction for the whole batch
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+
+    def _import_json_sidecars(self, directory: str) -> int:
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (_JSON_IMPORT_KEY,)
+            ).fetchone()
+        if done:
+            return 0
+
+        entries = []
+        if os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                if not is_metadata_sidecar(filename):
+                    continue
+                video_file = VideoFile.from_json_file(os.path.join(directory, filename))
+                if video_file:
+                    duration = video_file.duration.total_seconds() if video_file.duration else None
+                    entries.append((video_file, None, duration, None))
+
+        self._upsert(entries)
+        self._execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (_JSON_IMPORT_KEY, datetime.now(timezone.utc).isoformat())
+        )
+        logger.info(f"Imported {len(entries)} recordings from JSON sidecars into {self.db_path}")
+        return len(entries)
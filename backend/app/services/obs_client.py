@@ -0,0 +1,330 @@
+"""
+Asynchronous obs-websocket (protocol v5) client
+
+One websocket connection carries requests, responses and events. Every
+request gets a unique id and a future that the reader task resolves when
+the matching response arrives, so any number of requests can be in flight
+at once and none of them blocks the event loop.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import secrets
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+
+class OpCode:
+    HELLO = 0
+    IDENTIFY = 1
+    IDENTIFIED = 2
+    REIDENTIFY = 3
+    EVENT = 5
+    REQUEST = 6
+    REQUEST_RESPONSE = 7
+    REQUEST_BATCH = 8
+    REQUEST_BATCH_RESPONSE = 9
+
+
+class EventSubscription:
+    GENERAL = 1 << 0
+    CONFIG = 1 << 1
+    SCENES = 1 << 2
+    INPUTS = 1 << 3
+    TRANSITIONS = 1 << 4
+    FILTERS = 1 << 5
+    OUTPUTS = 1 << 6
+    SCENE_ITEMS = 1 << 7
+    MEDIA_INPUTS = 1 << 8
+    VENDORS = 1 << 9
+    UI = 1 << 10
+    ALL = (1 << 11) - 1  # All low-volume events
+    INPUT_VOLUME_METERS = 1 << 16  # High-volume, ~20 events per second
+
+
+class RequestBatchExecutionType:
+    SERIAL_REALTIME = 0  # One after another, as fast as possible
+    SERIAL_FRAME = 1  # One per rendered frame, on the graphics thread
+    PARALLEL = 2  # All at once on a thread pool, no order
+
+
+_RPC_VERSION = 1
+
+EventHandler = Callable[[dict], None]
+
+
+class OBSError(Exception):
+    """An OBS request failed"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class OBSConnectionError(OBSError):
+    """Not connected, connection lost or no response in time"""
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one request of a RequestBatch"""
+    request_type: str
+    ok: bool
+    code: Optional[int]
+    comment: Optional[str]
+    data: dict
+
+    def error(self) -> OBSError:
+        return OBSError(f"{self.request_type} failed: {self.comment or self.code}", self.code)
+
+
+BatchRequest = Tuple[str, Optional[dict]]
+
+
+class OBSClient:
+    """
+    Multiplexed obs-websocket v5 connection.
+
+    Usage:
+        client = OBSClient("localhost", 4455, "secret")
+        await client.connect()
+        status = await client.call("GetRecordStatus")
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 4455,
+        password: str = "",
+        subscriptions: int = EventSubscription.ALL,
+        request_timeout: float = 5.0
+    ):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.subscriptions = subscriptions
+        self.request_timeout = request_timeout
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._handlers: Dict[str, List[EventHandler]] = {}
+        self._closed = asyncio.Event()
+        self._closed.set()
+
+    @property
+    def connected(self) -> bool:
+        return not self._closed.is_set()
+
+    async def connect(self, timeout: float = 5.0):
+        """Open the connection and authenticate"""
+        try:
+            self._ws = await asyncio.wait_for(
+                websockets.connect(
+                    f"ws://{self.host}:{self.port}",
+                    subprotocols=["obswebsocket.json"],
+                    max_size=None
+                ),
+                timeout
+            )
+            hello = await asyncio.wait_for(self._receive(), timeout)
+            if hello.get("op") != OpCode.HELLO:
+                raise OBSConnectionError(f"Unexpected handshake message: {hello}")
+
+            identify = {"rpcVersion": _RPC_VERSION, "eventSubscriptions": self.subscriptions}
+            auth = hello["d"].get("authentication")
+            if auth:
+                identify["authentication"] = self._authentication(auth["salt"], auth["challenge"])
+            await self._send(OpCode.IDENTIFY, identify)
+
+            identified = await asyncio.wait_for(self._receive(), timeout)
+            if identified.get("op") != OpCode.IDENTIFIED:
+                raise OBSConnectionError(f"Identification failed: {identified}")
+        except asyncio.TimeoutError:
+            await self._close_socket()
+            raise OBSConnectionError(f"No response from OBS at {self.host}:{self.port}")
+        except (OSError, websockets.WebSocketException) as e:
+            await self._close_socket()
+            raise OBSConnectionError(f"Could not connect to OBS at {self.host}:{self.port}: {e}")
+        except BaseException:
+            await self._close_socket()
+            raise
+
+        self._closed.clear()
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        """Close the connection; pending requests fail with OBSConnectionError"""
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        await self._close_socket()
+        self._connection_lost("Connection closed")
+
+    async def wait_closed(self):
+        """Wait until the connection is closed or lost"""
+        await self._closed.wait()
+
+    async def call(self, request_type: str, data: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        """
+        Send a request and wait for its response
+
+        Args:
+            request_type: obs-websocket request, e.g. "GetRecordStatus"
+            data: Request fields
+            timeout: Seconds to wait (default: request_timeout)
+
+        Returns:
+            The response data (empty dict if there is none)
+
+        Raises:
+            OBSError: OBS rejected the request
+            OBSConnectionError: Not connected or no response in time
+        """
+        request_id = secrets.token_hex(8)
+        payload = {"requestType": request_type, "requestId": request_id}
+        if data:
+            payload["requestData"] = data
+
+        response = await self._request(OpCode.REQUEST, payload, request_id, timeout)
+        status = response["requestStatus"]
+        if not status.get("result"):
+            raise OBSError(
+                f"{request_type} failed: {status.get('comment') or status.get('code')}",
+                status.get("code")
+            )
+        return response.get("responseData") or {}
+
+    async def call_batch(
+        self,
+        requests: List[BatchRequest],
+        execution_type: int = RequestBatchExecutionType.SERIAL_REALTIME,
+        halt_on_failure: bool = False,
+        timeout: Optional[float] = None
+    ) -> List[BatchResult]:
+        """
+        Send several requests in one message (RequestBatch) and wait for all results
+
+        Args:
+            requests: (request_type, data) pairs, executed in order; use
+                ("Sleep", {"sleepMillis": ...}) or {"sleepFrames": ...} to wait in between
+            execution_type: See RequestBatchExecutionType
+            halt_on_failure: Skip the remaining requests after a failed one
+            timeout: Seconds to wait for the whole batch (default: request_timeout)
+
+        Returns:
+            One result per executed request; fewer than requested if halted
+
+        Raises:
+            OBSConnectionError: Not connected or no response in time
+        """
+        request_id = secrets.token_hex(8)
+        payload = {
+            "requestId": request_id,
+            "haltOnFailure": halt_on_failure,
+            "executionType": execution_type,
+            "requests": [
+                {"requestType": request_type, **({"requestData": data} if data else {})}
+                for request_type, data in requests
+            ]
+        }
+
+        response = await self._request(OpCode.REQUEST_BATCH, payload, request_id, timeout)
+        results = []
+        for result in response.get("results", []):
+            status = result.get("requestStatus", {})
+            results.append(BatchResult(
+                request_type=result.get("requestType"),
+                ok=bool(status.get("result")),
+                code=status.get("code"),
+                comment=status.get("comment"),
+                data=result.get("responseData") or {}
+            ))
+        return results
+
+    async def set_subscriptions(self, subscriptions: int):
+        """Change the subscribed event categories (Reidentify)"""
+        if subscriptions == self.subscriptions:
+            return
+        if not self.connected:
+            raise OBSConnectionError("Not connected to OBS")
+        self.subscriptions = subscriptions
+        await self._send(OpCode.REIDENTIFY, {"eventSubscriptions": subscriptions})
+
+    def on(self, event_type: str, handler: EventHandler):
+        """Call handler(event_data) for every event of this type"""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def off(self, event_type: str, handler: EventHandler):
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    async def _request(self, op: int, payload: dict, request_id: str, timeout: Optional[float]) -> dict:
+        if not self.connected:
+            raise OBSConnectionError("Not connected to OBS")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send(op, payload)
+            return await asyncio.wait_for(future, timeout or self.request_timeout)
+        except asyncio.TimeoutError:
+            raise OBSConnectionError(f"No response from OBS within {timeout or self.request_timeout:g}s")
+        except websockets.WebSocketException as e:
+            raise OBSConnectionError(f"Connection to OBS lost: {e}")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_loop(self):
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                op, data = message.get("op"), message.get("d", {})
+
+                if op in (OpCode.REQUEST_RESPONSE, OpCode.REQUEST_BATCH_RESPONSE):
+                    future = self._pending.get(data.get("requestId"))
+                    if future and not future.done():
+                        future.set_result(data)
+                elif op == OpCode.EVENT:
+                    self._dispatch(data.get("eventType"), data.get("eventData") or {})
+        except websockets.WebSocketException as e:
+            logger.warning(f"OBS connection lost: {e}")
+        finally:
+            self._connection_lost("Connection to OBS lost")
+
+    def _dispatch(self, event_type: str, data: dict):
+        for handler in list(self._handlers.get(event_type, ())):
+            try:
+                handler(data)
+            except Exception as e:
+                logger.exception(f"Error in OBS event handler for {event_type}: {e}")
+
+    def _connection_lost(self, reason: str):
+        self._closed.set()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(OBSConnectionError(reason))
+
+    async def _send(self, op: int, data: dict):
+        await self._ws.send(json.dumps({"op": op, "d": data}))
+
+    async def _receive(self) -> dict:
+        return json.loads(await self._ws.recv())
+
+    async def _close_socket(self):
+        if self._ws is not None:
+            try:
+                await self._ws.close()
+            except Exception:
+                pass
+            self._ws = None
+
+    def _authentication(self, salt: str, challenge: str) -> str:
+        secret = base64.b64encode(hashlib.sha256((self.password + salt).encode()).digest())
+        return base64.b64encode(hashlib.sha256(secret + challenge.encode()).digest()).decode()
@@ -1,10 +1,12 @@
 import asyncio
 import logging
-from typing import Optional
-import obsws_python as obs
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 from datetime import datetime
 
 from app.models.video import VideoFile
+from app.services.obs_client import OBSClient, EventSubscription, RequestBatchExecutionType
 
 logger = logging.getLogger(__name__)
 
@@ -13,19 +15,41 @@ class OBSService:
     """Service for interacting with OBS Studio"""
 
     def __init__(self):
-        self.client: Optional[obs.ReqClient] = None
-        self.event_client: Optional[obs.EventClient] = None
+        self.client: Optional[OBSClient] = None
         self.connected: bool = False
         self.recording: bool = False
         self.muted: bool = False
+        self.mic_muted: Optional[bool] = None
         self.current_file: Optional[VideoFile] = None
+        self.last_output_path: Optional[str] = None
         self.show_logo: bool = True
+        self._stopping: bool = False
+
+        # Live counters of the active recording, sampled from GetRecordStatus
+        self.output_duration: Optional[float] = None  # seconds
+        self.output_bytes: Optional[int] = None
+        self._output_paused: bool = False
+        self._output_sampled_at: float = 0.0
+
+        # Seconds from the start/stop trigger until OBS reported the new state
+        self.start_latency: Optional[float] = None
+        self.stop_latency: Optional[float] = None
+        self._start_requested_at: Optional[float] = None
+        self._stop_requested_at: Optional[float] = None
 
         # Connection settings (will be set via configure method)
         self.host: str = "localhost"
         self.port: int = 4455
         self.password: str = ""
         self.max_reconnect_delay: int = 30
+        self.request_timeout: float = 5.0
+        self.reconcile_interval: float = 30.0
+        self.read_cache_ttl: float = 0.5
+
+        # Single-flight reads: one OBS call per key, shared by concurrent callers
+        self._reads: Dict[str, asyncio.Task] = {}
+        self._read_cache: Dict[str, Tuple[float, Any]] = {}
+        self._read_stats = {"calls": 0, "shared": 0, "cached": 0}
 
         # Background connection task
         self._connection_task: Optional[asyncio.Task] = None
@@ -34,13 +58,26 @@ class OBSService:
         self._reconnect_delay: float = 1.0
         self._connection_failures: int = 0
     
-    async def configure(self, host: str, port: int, password: str, show_logo: bool = True, max_reconnect_delay: int = 30):
+    async def configure(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        show_logo: bool = True,
+        max_reconnect_delay: int = 30,
+        request_timeout: float = 5.0,
+        reconcile_interval: float = 30.0,
+        read_cache_ttl: float = 0.5
+    ):
         """Configure OBS connection settings"""
         self.host = host
         self.port = port
         self.password = password
         self.show_logo = show_logo
         self.max_reconnect_delay = max_reconnect_delay
+        self.request_timeout = request_timeout
+        self.reconcile_interval = reconcile_interval
+        self.read_cache_ttl = read_cache_ttl
 
         # Start connection loop
         if self._connection_task is None or self._connection_task.done():
@@ -55,10 +92,8 @@ class OBSService:
                     # Use exponential backoff when disconnected
                     await asyncio.sleep(self._reconnect_delay)
                 else:
-                    # Verify recording status if we think we're recording
-                    await self._verify_recording_status()
-                    # When connected, check every second
-                    await asyncio.sleep(1)
+                    # State changes arrive as events; only reconcile now and then
+                    await self._wait_for_disconnect()
             except asyncio.CancelledError:
                 logger.info("Connection loop cancelled")
                 break
@@ -69,21 +104,44 @@ class OBSService:
     async def _try_connect(self):
         """Try to connect to OBS with exponential backoff"""
         try:
-            self.client = obs.ReqClient(
-                host=self.host,
-                port=self.port,
-                password=self.password
-            )
-            self.event_client = obs.EventClient(
+            if self.client:
+                await self.client.close()
+            self._read_cache.clear()
+
+            self.client = OBSClient(
                 host=self.host,
                 port=self.port,
                 password=self.password,
-                subs=obs.Subs.INPUTVOLUMEMETERS
+                request_timeout=self.request_timeout
             )
-
-            # Get current recording status
-            status = self.client.get_record_status()
-            self.recording = status.output_active
+            self._register_event_handlers(self.client)
+            await self.client.connect()
+
+            # Read the state and apply scene and logo in one round trip; the
+            # changes are applied on the graphics thread, frame by frame
+            status, mic, scene, logo = await self.client.call_batch([
+                ("GetRecordStatus", None),
+                ("GetInputMute", {"inputName": "Mic"}),
+                ("SetCurrentProgramScene", {"sceneName": "main"}),
+                ("SetSourceFilterEnabled", {
+                    "sourceName": "logo",
+                    "filterName": "hide",
+                    "filterEnabled": not self.show_logo
+                })
+            ], execution_type=RequestBatchExecutionType.SERIAL_FRAME)
+            if not status.ok:
+                raise status.error()
+
+            # From here on events keep the state up to date
+            self.recording = status.data["outputActive"]
+            self._update_output_counters(status.data)
+            self.mic_muted = mic.data.get("inputMuted") if mic.ok else None
+            if scene.ok:
+                self.muted = False
+            else:
+                logger.warning(f"Could not switch to the main scene: {scene.error()}")
+            if not logo.ok:
+                logger.warning(f"Could not set logo visibility: {logo.error()}")
 
             self.connected = True
 
@@ -91,9 +149,6 @@ class OBSService:
             self._reconnect_delay = 1.0
             self._connection_failures = 0
 
-            self.unmute_video()
-            self.set_logo(self.show_logo)
-
             logger.info("Successfully connected to OBS")
         except Exception as e:
             self.connected = False
@@ -116,41 +171,221 @@ class OBSService:
                 f"Retrying in {self._reconnect_delay}s..."
             )
     
-    async def _verify_recording_status(self):
-        """Verify that the actual recording status matches our internal state"""
+    async def _wait_for_disconnect(self):
+        """Wait until the connection drops, reconciling the state every reconcile_interval"""
         try:
-            if self.client:
-                status = await asyncio.to_thread(self.client.get_record_status)
-                actual_recording = status.output_active
-
-                # If there's a mismatch, update our state and log it
-                if actual_recording != self.recording:
-                    logger.warning(
-                        f"Recording status mismatch detected! "
-                        f"Expected: {self.recording}, Actual: {actual_recording}. "
-                        f"Synchronizing state..."
-                    )
-                    self.recording = actual_recording
-
-                    # If recording stopped unexpectedly, clear current file
-                    if not actual_recording and self.current_file:
-                        logger.warning(f"Recording stopped unexpectedly: {self.current_file.filename}")
-                        self.current_file = None
+            await asyncio.wait_for(self.client.wait_closed(), self.reconcile_interval)
+        except asyncio.TimeoutError:
+            await self._reconcile_state()
+        else:
+            logger.warning("Connection to OBS lost")
+            self.connected = False
+
+    async def _reconcile_state(self):
+        """Safety net: compare the event-driven state with what OBS reports"""
+        try:
+            status = await self.client.call("GetRecordStatus")
+            scene = await self.client.call("GetCurrentProgramScene")
         except Exception as e:
-            logger.debug(f"Could not verify recording status: {e}")
-            # Don't disconnect on verification errors, just skip this check
+            logger.debug(f"Could not reconcile OBS state: {e}")
+            # Don't disconnect on reconciliation errors, just skip this check
+            return
+
+        self._update_output_counters(status)
+        actual_recording = status["outputActive"]
+        if actual_recording != self.recording and not self._stopping:
+            logger.warning(
+                f"Recording status mismatch detected! "
+                f"Expected: {self.recording}, Actual: {actual_recording}. "
+                f"Synchronizing state..."
+            )
+            self._set_recording(actual_recording)
+
+        muted = scene.get("currentProgramSceneName", scene.get("sceneName")) == "muted"
+        if muted != self.muted:
+            logger.warning(f"Scene mismatch detected, muted: {muted}")
+            self.muted = muted
+
+    def _register_event_handlers(self, client: OBSClient):
+        client.on("RecordStateChanged", self._on_record_state_changed)
+        client.on("CurrentProgramSceneChanged", self._on_program_scene_changed)
+        client.on("InputMuteStateChanged", self._on_input_mute_state_changed)
+        client.on("ExitStarted", self._on_exit_started)
+
+    def _on_record_state_changed(self, data: dict):
+        state = data.get("outputState")
+        now = time.monotonic()
+
+        if state == "OBS_WEBSOCKET_OUTPUT_STARTED":
+            if self._start_requested_at is not None:
+                self.start_latency = now - self._start_requested_at
+                self._start_requested_at = None
+                logger.info(f"Recording started {self.start_latency * 1000:.0f}ms after the trigger")
+            if not self.recording:
+                if self.current_file is None:
+                    logger.warning("Recording was started in OBS directly")
+                self._set_recording(True)
+            self.output_duration = 0.0
+            self.output_bytes = self.output_bytes or 0
+            self._output_paused = False
+            self._output_sampled_at = now
+        elif state == "OBS_WEBSOCKET_OUTPUT_STOPPED":
+            if self._stop_requested_at is not None:
+                self.stop_latency = now - self._stop_requested_at
+                self._stop_requested_at = None
+            if data.get("outputPath"):
+                self.last_output_path = data["outputPath"]
+                logger.info(f"OBS wrote recording to {self.last_output_path}")
+            if self.recording and not self._stopping:
+                # Stopped in OBS itself or because of an error
+                self._set_recording(False)
+        elif state == "OBS_WEBSOCKET_OUTPUT_PAUSED":
+            if self.output_duration is not None and not self._output_paused:
+                self.output_duration += now - self._output_sampled_at
+            self._output_paused = True
+            self._output_sampled_at = now
+        elif state == "OBS_WEBSOCKET_OUTPUT_RESUMED":
+            self._output_paused = False
+            self._output_sampled_at = now
+
+    def _on_program_scene_changed(self, data: dict):
+        self.muted = data.get("sceneName") == "muted"
+
+    def _on_input_mute_state_changed(self, data: dict):
+        if data.get("inputName") == "Mic":
+            self.mic_muted = data.get("inputMuted")
+            logger.info(f"Mic {'muted' if self.mic_muted else 'unmuted'} in OBS")
+
+    def _on_exit_started(self, data: dict):
+        logger.warning("OBS is shutting down")
+        self.connected = False
+        self._set_recording(False)
+        # Let the connection loop notice right away instead of at the socket timeout
+        asyncio.create_task(self.client.close())
+
+    def _set_recording(self, recording: bool):
+        self.recording = recording
+        if not recording:
+            self.output_duration = None
+            self.output_bytes = None
+            if self.current_file:
+                logger.warning(f"Recording stopped unexpectedly: {self.current_file.filename}")
+                self.current_file = None
+
+    async def _shared_read(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float = 0.0) -> Any:
+        """
+        Run a read through the single-flight layer
+
+        Concurrent callers with the same key share one running fetch, and its
+        result is reused for ttl seconds, so the load on OBS doesn't grow
+        with the number of clients.
+
+        Args:
+            key: Identifies the read, e.g. "screenshot"
+            fetch: Coroutine function doing the actual OBS call(s)
+            ttl: Seconds a successful result is served from the cache
+        """
+        cached = self._read_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self._read_stats["cached"] += 1
+            return cached[1]
+
+        task = self._reads.get(key)
+        if task is None:
+            self._read_stats["calls"] += 1
+            task = asyncio.create_task(fetch())
+            self._reads[key] = task
+            task.add_done_callback(lambda t: self._shared_read_done(key, t, ttl))
+        else:
+            self._read_stats["shared"] += 1
+
+        # Shield so one cancelled request doesn't abort the shared call
+        return await asyncio.shield(task)
+
+    def _shared_read_done(self, key: str, task: asyncio.Task, ttl: float):
+        self._reads.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if ttl > 0:
+            self._read_cache[key] = (time.monotonic() + ttl, task.result())
+
+    def _update_output_counters(self, status: dict):
+        """Keep duration and bytes reported by GetRecordStatus"""
+        if status["outputActive"]:
+            self.output_duration = status["outputDuration"] / 1000
+            self.output_bytes = status["outputBytes"]
+            self._output_paused = status.get("outputPaused", False)
+        else:
+            self.output_duration = None
+            self.output_bytes = None
+        self._output_sampled_at = time.monotonic()
+
+    async def fetch_live_counters(self) -> Optional[dict]:
+        """
+        Like get_live_counters, with the byte count fetched from OBS
+
+        Only the size needs OBS (the duration is extrapolated). The
+        GetRecordStatus call is shared by concurrent callers and cached for
+        read_cache_ttl, so polling clients don't add requests.
+        """
+        if self.recording and self.current_file is not None and self.client is not None:
+            try:
+                await self._shared_read("record_status", self._fetch_record_status, self.read_cache_ttl)
+            except Exception as e:
+                # Keep the last sample
+                logger.debug(f"Could not fetch recording status: {e}")
+        return self.get_live_counters()
+
+    async def _fetch_record_status(self) -> dict:
+        status = await self.client.call("GetRecordStatus")
+        self._update_output_counters(status)
+        return status
+
+    def get_live_counters(self) -> Optional[dict]:
+        """
+        Get live duration and size of the active recording
+
+        The duration is extrapolated from the last status sample, so it is
+        accurate to well below a second without any file access.
+
+        Returns:
+            Dict with filename, duration (seconds) and bytes, or None if
+            no recording started by this service is running
+        """
+        if not self.recording or self.current_file is None or self.output_duration is None:
+            return None
+
+        duration = self.output_duration
+        if not self._output_paused:
+            duration += time.monotonic() - self._output_sampled_at
+
+        return {
+            "filename": self.current_file.filename,
+            "duration": round(duration, 3),
+            "bytes": self.output_bytes
+        }
 
     async def disconnect(self):
         """Disconnect from OBS"""
         if self._connection_task:
             self._connection_task.cancel()
+        if self.client:
+            await self.client.close()
 
         self.connected = False
         self.client = None
-        self.event_client = None
     
-    async def start_recording(self) -> Optional[VideoFile]:
-        """Start recording"""
+    async def start_recording(self, reload_camera: bool = False, settle_time: float = 0.0) -> Optional[VideoFile]:
+        """
+        Start recording
+
+        All steps are sent to OBS as one request batch and executed there
+        back to back, without a round trip in between.
+
+        Args:
+            reload_camera: Re-apply the camera settings first (helps with stability)
+            settle_time: Seconds OBS waits after the camera reload before recording
+        """
         if not self.connected:
             logger.error("Cannot start recording: Not connected to OBS")
             return None
@@ -160,20 +395,50 @@ class OBSService:
             return None
 
         try:
+            self._start_requested_at = time.monotonic()
+
             # Create new video file
             self.current_file = VideoFile()
 
             # Set filename in OBS profile
-            self.client.set_profile_parameter("Output", "FilenameFormatting", self.current_file.filename)
+            requests = [("SetProfileParameter", {
+                "parameterCategory": "Output",
+                "parameterName": "FilenameFormatting",
+                "parameterValue": self.current_file.filename
+            })]
+            if reload_camera:
+                requests.append(("SetInputSettings", {
+                    "inputName": "Camera",
+                    "inputSettings": {"disable": True},
+                    "overlay": True
+                }))
+                if settle_time > 0:
+                    # Give camera time to stabilize
+                    requests.append(("Sleep", {"sleepMillis": int(settle_time * 1000)}))
+            requests.append(("StartRecord", None))
+
+            results = await self.client.call_batch(
+                requests, timeout=self.request_timeout + max(0.0, settle_time)
+            )
+            for result in results[:-1]:
+                if not result.ok:
+                    # Best effort; the recording is started anyway
+                    logger.warning(f"{result.error()} (continuing)")
+            if len(results) != len(requests) or not results[-1].ok:
+                raise results[-1].error() if results else Exception("Empty batch response")
 
-            # Start recording
-            self.client.start_record()
             self.recording = True
+            if self.output_duration is None:
+                self.output_duration = 0.0
+                self.output_bytes = 0
+                self._output_sampled_at = time.monotonic()
 
             logger.info(f"Started recording: {self.current_file.filename}")
             return self.current_file
 
         except Exception as e:
+            self._start_requested_at = None
+            self.current_file = None
             self.connected = False
             logger.exception(f"Error starting recording: {e}")
             raise Exception("Error starting recording")
@@ -189,53 +454,71 @@ class OBSService:
             return None
 
         try:
-            # Stop recording
-            self.client.stop_record()
+            # Stop recording; the STOPPED event may arrive before the response
+            self._stopping = True
+            self._stop_requested_at = time.monotonic()
+            result = await self.client.call("StopRecord")
             self.recording = False
-
-            logger.info("Recording stopped")
+            self.output_duration = None
+            self.output_bytes = None
 
             # Return the file that was recorded
             file = self.current_file
             self.current_file = None
+
+            # Set per stop, so a path from an earlier recording is never reused
+            output_path = result.get("outputPath")
+            self.last_output_path = output_path
+
+            logger.info(f"Recording stopped: {output_path or 'unknown output path'}")
             return file
 
         except Exception as e:
             self.connected = False
             logger.exception(f"Error stopping recording: {e}")
             raise Exception("Error stopping recording")
+        finally:
+            self._stopping = False
     
+    def recorded_filename(self) -> Optional[str]:
+        """Filename (without extension) OBS reported for the last stopped recording"""
+        if not self.last_output_path:
+            return None
+        return os.path.splitext(os.path.basename(self.last_output_path))[0]
+
     async def get_screenshot(self) -> Optional[str]:
-        """Get screenshot from OBS as base64"""
+        """Get screenshot from OBS as base64 (shared by concurrent callers, cached for read_cache_ttl)"""
         if not self.connected:
             logger.error("Cannot get screenshot: Not connected to OBS")
             return None
 
+        return await self._shared_read("screenshot", self._fetch_screenshot, self.read_cache_ttl)
+
+    async def _fetch_screenshot(self) -> str:
         try:
             # Get screenshot from "main" source
-            result = await asyncio.to_thread(
-                self.client.get_source_screenshot,
-                name="main",
-                img_format="jpg",
-                width=512,
-                height=288,
-                quality=50
-            )
-            return result.image_data
+            result = await self.client.call("GetSourceScreenshot", {
+                "sourceName": "main",
+                "imageFormat": "jpg",
+                "imageWidth": 512,
+                "imageHeight": 288,
+                "imageCompressionQuality": 50
+            })
+            return result["imageData"]
 
         except Exception as e:
             self.connected = False
             logger.exception(f"Error getting screenshot: {e}")
             raise Exception("Error getting screenshot")
     
-    def mute_video(self):
+    async def mute_video(self):
         """Mute video by switching to 'muted' scene"""
         if not self.connected:
             logger.warning("Cannot mute video: Not connected to OBS")
             return
 
         try:
-            self.client.set_current_program_scene("muted")
+            await self.client.call("SetCurrentProgramScene", {"sceneName": "muted"})
             self.muted = True
             logger.info("Video muted")
 
@@ -244,14 +527,14 @@ class OBSService:
             logger.exception(f"Error muting video: {e}")
             raise Exception("Error muting video")
     
-    def unmute_video(self):
+    async def unmute_video(self):
         """Unmute video by switching back to 'main' scene"""
         if not self.connected:
             logger.warning("Cannot unmute video: Not connected to OBS")
             return
 
         try:
-            self.client.set_current_program_scene("main")
+            await self.client.call("SetCurrentProgramScene", {"sceneName": "main"})
             self.muted = False
             logger.info("Video unmuted")
 
@@ -260,7 +543,7 @@ class OBSService:
             logger.exception(f"Error unmuting video: {e}")
             raise Exception("Error unmuting video")
     
-    def reload_camera(self):
+    async def reload_camera(self):
         """Reload camera source by disabling and re-enabling it"""
         if not self.connected:
             logger.warning("Cannot reload camera: Not connected to OBS")
@@ -268,18 +551,22 @@ class OBSService:
 
         try:
             # Get current camera settings
-            settings = self.client.get_input_settings("Camera")
+            settings = await self.client.call("GetInputSettings", {"inputName": "Camera"})
 
             # Disable camera
             logger.info("Disabling camera")
-            self.client.set_input_settings("Camera", {"disable": True}, True)
+            await self.client.call("SetInputSettings", {
+                "inputName": "Camera",
+                "inputSettings": {"disable": True},
+                "overlay": True
+            })
 
         except Exception as e:
             self.connected = False
             logger.exception(f"Error disabling camera: {e}")
             raise Exception("Error disabling camera")
     
-    def set_logo(self, visible: bool = True):
+    async def set_logo(self, visible: bool = True):
         """Set logo visibility by enabling/disabling the 'hide' filter"""
         if not self.connected:
             logger.warning("Cannot set logo: Not connected to OBS")
@@ -289,7 +576,11 @@ class OBSService:
             # Enable/disable the "hide" filter on the "logo" source
             # If visible=True, we disable the "hide" filter (to show the logo)
             # If visible=False, we enable the "hide" filter (to hide the logo)
-            self.client.set_source_filter_enabled("logo", "hide", not visible)
+            await self.client.call("SetSourceFilterEnabled", {
+                "sourceName": "logo",
+                "filterName": "hide",
+                "filterEnabled": not visible
+            })
             logger.info(f"Logo visibility set to: {visible}")
 
         except Exception as e:
@@ -303,12 +594,17 @@ class OBSService:
             logger.warning("Cannot check audio: Not connected to OBS")
             return 0
 
+        # Overlapping checks (monitor and admin) share one measurement, so one
+        # doesn't unsubscribe the volume meters while the other is listening
+        return await self._shared_read("audio", self._measure_audio)
+
+    async def _measure_audio(self) -> float:
         try:
             vol = {"min": 1, "max": 0}
 
-            def on_input_volume_meters(data):
+            def on_input_volume_meters(data: dict):
                 """Callback to collect audio volume data"""
-                for source in data.inputs:
+                for source in data.get("inputs", []):
                     if source.get("inputName") == "Mic":
                         try:
                             val = source.get("inputLevelsMul")[0][0]
@@ -319,14 +615,21 @@ class OBSService:
                         if val > vol["max"]:
                             vol["max"] = val
 
-            # Register callback
-            self.event_client.callback.register(on_input_volume_meters)
-
-            # Wait for 2 seconds to collect data
-            await asyncio.sleep(2)
+            # Register callback; volume meters are only subscribed while
+            # checking, as OBS sends them ~20 times per second
+            self.client.on("InputVolumeMeters", on_input_volume_meters)
+            await self.client.set_subscriptions(
+                EventSubscription.ALL | EventSubscription.INPUT_VOLUME_METERS
+            )
 
-            # Deregister callback
-            self.event_client.callback.deregister(on_input_volume_meters)
+            try:
+                # Wait for 2 seconds to collect data
+                await asyncio.sleep(2)
+            finally:
+                # Deregister callback
+                self.client.off("InputVolumeMeters", on_input_volume_meters)
+                if self.client.connected:
+                    await self.client.set_subscriptions(EventSubscription.ALL)
 
             # Return the range
             return vol["max"] - vol["min"]
@@ -337,9 +640,17 @@ class OBSService:
     
     def get_status(self) -> dict:
         """Get current OBS status"""
+        live = self.get_live_counters()
         return {
             "is_connected": self.connected,
             "is_recording": self.recording,
             "muted": self.muted,
-            "current_file": self.current_file.filename if self.current_file else None
+            "mic_muted": self.mic_muted,
+            "current_file": self.current_file.filename if self.current_file else None,
+            "output_duration": live["duration"] if live else None,
+            "output_bytes": live["bytes"] if live else None,
+            "last_output_path": self.last_output_path,
+            "start_latency": round(self.start_latency, 3) if self.start_latency is not None else None,
+            "stop_latency": round(self.stop_latency, 3) if self.stop_latency is not None else None,
+            "reads": dict(self._read_stats)
         }
@@ -0,0 +1,158 @@
+"""
+Live preview broadcaster
+
+Instead of every viewer polling OBS for a screenshot, one capture loop grabs
+frames while at least one viewer is connected and pushes each JPEG to all
+subscribers (WebSocket or MJPEG). The capture rate adapts to how long OBS
+takes per screenshot and backs off on errors, so the OBS load depends
+neither on the number of viewers nor on the transport.
+
+Every subscriber only holds the newest frame: a client that can't keep up
+skips the frames it missed instead of falling behind.
+"""
+
+import asyncio
+import base64
+import logging
+import time
+from typing import NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Target share of the time OBS spends rendering preview screenshots
+_CAPTURE_DUTY_CYCLE = 0.25
+
+
+class PreviewFrame(NamedTuple):
+    data: bytes  # JPEG
+    sequence: int
+    captured_at: float  # time.time()
+
+
+class PreviewSubscription:
+    """Newest frame for one viewer; a frame replaced before it was read is dropped"""
+
+    def __init__(self):
+        self._frame: Optional[PreviewFrame] = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.dropped = 0
+
+    def push(self, frame: PreviewFrame):
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._ready.set()
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[PreviewFrame]:
+        """Wait for the next frame; None once the broadcaster stopped"""
+        while self._frame is None and not self._closed:
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+class PreviewBroadcaster:
+    """
+    Captures the OBS preview only while someone is watching and fans it out.
+
+    The interval between captures is min_interval at best, grows with the
+    screenshot time (at most _CAPTURE_DUTY_CYCLE of the time is spent
+    waiting for OBS) and doubles up to max_interval while OBS fails or is
+    disconnected.
+    """
+
+    def __init__(self, obs_service, min_interval: float = 0.5, max_interval: float = 2.0):
+        self.obs_service = obs_service
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min_interval
+        self.latest: Optional[PreviewFrame] = None
+        self.frames = 0
+        self._subscriptions: Set[PreviewSubscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_image: Optional[str] = None
+
+    def subscribe(self) -> PreviewSubscription:
+        """Receive preview frames; starts the capture loop for the first viewer"""
+        subscription = PreviewSubscription()
+        self._subscriptions.add(subscription)
+
+        # A recent frame is shown right away instead of after the next capture
+        if self.latest and time.time() - self.latest.captured_at < self.max_interval:
+            subscription.push(self.latest)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._capture_loop())
+            logger.info("Preview capture started")
+        return subscription
+
+    def unsubscribe(self, subscription: PreviewSubscription):
+        """Stop sending frames; the capture loop stops with the last viewer"""
+        self._subscriptions.discard(subscription)
+        subscription.close()
+        if not self._subscriptions and self._task:
+            self._task.cancel()
+            self._task = None
+            logger.info("Preview capture stopped, no viewers left")
+
+    async def stop(self):
+        """Stop capturing and end all subscriptions"""
+        for subscription in list(self._subscriptions):
+            subscription.close()
+        self._subscriptions.clear()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_status(self) -> dict:
+        return {
+            "viewers": len(self._subscriptions),
+            "capturing": self._task is not None and not self._task.done(),
+            "interval": round(self.interval, 3),
+            "frames": self.frames,
+            "dropped": sum(subscription.dropped for subscription in self._subscriptions)
+        }
+
+    async def _capture_loop(self):
+        while True:
+            started = time.monotonic()
+            try:
+                captured = await self._capture()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Preview capture failed: {e}")
+                captured = False
+
+            if captured:
+                elapsed = time.monotonic() - started
+                self.interval = min(self.max_interval, max(self.min_interval, elapsed / _CAPTURE_DUTY_CYCLE))
+            else:
+                self.interval = min(self.max_interval, self.interval * 2)
+
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def _capture(self) -> bool:
+        """Grab a screenshot and send it to all viewers; False if OBS delivered none"""
+        image = await self.obs_service.get_screenshot()
+        if not image:
+            return False
+        if image is self._last_image:
+            # Same cached screenshot the /preview endpoint got; nothing new to send
+            return True
+        self._last_image = image
+
+        # OBS returns a data URL ("data:image/jpg;base64,...")
+        data = base64.b64decode(image.partition(",")[2] or image)
+        self.frames += 1
+        self.latest = PreviewFrame(data, self.frames, time.time())
+        for subscription in self._subscriptions:
+            subscription.push(self.latest)
+        return True
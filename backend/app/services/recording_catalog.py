@@ -0,0 +1,91 @@
+import bisect
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.timezone import to_utc
+from app.models.video import VideoFile
+
+
+def _sort_key(video_file: VideoFile) -> Tuple[float, str]:
+    """Ordering key: UTC start timestamp, filename as tie-breaker"""
+    return (to_utc(video_file.start_time).timestamp(), video_file.filename)
+
+
+class RecordingCatalog:
+    """
+    Indexed in-memory catalog of recordings.
+
+    Keeps two indexes over the same VideoFile objects:
+    - a hash index by filename for O(1) lookups
+    - a list of (start timestamp, filename) keys kept sorted with bisect,
+      so positions are found in O(log n) and newest/oldest/count are O(1)
+    """
+
+    def __init__(self):
+        self._by_name: Dict[str, VideoFile] = {}
+        self._order: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._by_name
+
+    def __iter__(self) -> Iterator[VideoFile]:
+        """Iterate recordings oldest first"""
+        for _, filename in self._order:
+            yield self._by_name[filename]
+
+    def get(self, filename: str) -> Optional[VideoFile]:
+        """Get a recording by filename"""
+        return self._by_name.get(filename)
+
+    def add(self, video_file: VideoFile) -> bool:
+        """
+        Add a recording, replacing an existing entry with the same filename
+
+        Returns:
+            True if the recording was not in the catalog before
+        """
+        existing = self.remove(video_file.filename)
+        self._by_name[video_file.filename] = video_file
+        bisect.insort(self._order, _sort_key(video_file))
+        return existing is None
+
+    def remove(self, filename: str) -> Optional[VideoFile]:
+        """Remove a recording by filename and return it"""
+        video_file = self._by_name.pop(filename, None)
+        if video_file is None:
+            return None
+
+        key = _sort_key(video_file)
+        index = bisect.bisect_left(self._order, key)
+        if index < len(self._order) and self._order[index] == key:
+            del self._order[index]
+        return video_file
+
+    def newest(self) -> Optional[VideoFile]:
+        """Get the recording with the latest start time"""
+        if not self._order:
+            return None
+        return self._by_name[self._order[-1][1]]
+
+    def oldest(self) -> Optional[VideoFile]:
+        """Get the recording with the earliest start time"""
+        if not self._order:
+            return None
+        return self._by_name[self._order[0][1]]
+
+    def newest_first(self) -> Iterator[VideoFile]:
+        """
+        Iterate recordings newest first without copying the index
+
+        Not safe across awaits: take a list() if the catalog may change meanwhile.
+        """
+        for _, filename in reversed(self._order):
+            yield self._by_name[filename]
+
+    def started_before(self, cutoff: datetime) -> List[VideoFile]:
+        """Get all recordings that started before the given time, oldest first"""
+        index = bisect.bisect_left(self._order, (to_utc(cutoff).timestamp(), ""))
+        return [self._by_name[filename] for _, filename in self._order[:index]]
@@ -136,19 +136,11 @@ class RecordingScheduler:
                     self._start_attempts += 1
                     logger.info(f"Starting recording (attempt {attempt}/{max_retries})...")
 
-                    # Reload camera before starting (helps with stability)
-                    try:
-                        await asyncio.to_thread(self.obs_service.reload_camera)
-                        logger.info("Camera reloaded successfully")
-                    except Exception as cam_error:
-                        logger.warning(f"Camera reload failed (attempt {attempt}/{max_retries}): {cam_error}")
-                        # Continue anyway - camera reload is best-effort
-
-                    # Give camera time to stabilize
-                    await asyncio.sleep(1)
-
-                    # Start recording
-                    video_file = await self.obs_service.start_recording()
+                    # Camera reload, settle time and start run in OBS as one batch
+                    video_file = await self.obs_service.start_recording(
+                        reload_camera=True,
+                        settle_time=settings.CAMERA_SETTLE_TIME
+                    )
 
                     if video_file:
                         # Add to file manager
@@ -156,7 +148,7 @@ class RecordingScheduler:
 
                         # Save metadata
                         try:
-                            video_file.to_json_file(self.file_service.video_directory)
+                            await self.file_service.save_metadata(video_file)
                         except Exception as meta_error:
                             logger.warning(f"Failed to save metadata: {meta_error}")
                             # Continue - metadata can be regenerated later
@@ -218,14 +210,25 @@ class RecordingScheduler:
                     # Stop recording
                     video_file = await self.obs_service.stop_recording()
 
+                    recorded = self.obs_service.recorded_filename()
+                    if video_file and recorded and recorded != video_file.filename:
+                        # OBS didn't apply the filename formatting; keep the metadata with the real file
+                        logger.warning(f"OBS recorded {recorded} instead of {video_file.filename}")
+                        video_file = await self.file_service.rename_file(video_file.filename, recorded) or video_file
+
                     if video_file:
                         # Update metadata
                         try:
-                            video_file.to_json_file(self.file_service.video_directory)
+                            await self.file_service.save_metadata(video_file)
                         except Exception as meta_error:
                             logger.warning(f"Failed to save metadata: {meta_error}")
                             # Continue - metadata can be regenerated later
 
+                        # Index keyframes and render the scrubbing sprite sheet now so
+                        # the first scrub/export doesn't pay for it
+                        self.file_service.schedule_keyframe_index(video_file.filename)
+                        self.file_service.schedule_sprite_sheet(video_file.filename)
+
                         self._last_stop_error = None
                         logger.info(
                             f"✓ Recording stopped successfully: {video_file.filename} "
@@ -351,6 +354,10 @@ class RecordingScheduler:
 
     async def _cleanup_loop(self):
         """Periodic cleanup loop for old files and subclips with robust error handling"""
+        # Retention cleanup needs the full catalog and the export cache index;
+        # the file service runs its own first pass while initializing
+        await self.file_service.wait_initialized()
+
         while self._running:
             try:
                 await self._run_cleanup()
@@ -380,9 +387,9 @@ class RecordingScheduler:
                 deleted_count = await self.file_service.delete_old_files(settings.delete_age)
                 logger.info(f"Cleanup: Deleted {deleted_count} old video files")
 
-            # Delete subclips
-            subclip_count = await self.file_service.delete_subclips()
-            logger.info(f"Cleanup: Deleted {subclip_count} subclip files")
+            # Evict expired exports
+            export_count = await self.file_service.cleanup_exports()
+            logger.info(f"Cleanup: Deleted {export_count} export files")
 
             # Delete old log files (keep logs for the same duration as videos)
             if settings.delete_age:
@@ -0,0 +1,129 @@
+"""
+Thumbnail sprite sheets for timeline scrubbing
+
+A sprite sheet is one JPEG holding a grid of small tiles, one every few
+seconds of a recording, plus a JSON manifest with the tile geometry and the
+timestamp of every tile. Tiles are taken from keyframes only, so building a
+sheet decodes one frame per tile instead of the whole recording.
+"""
+
+import os
+import json
+import logging
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from app.services.keyframe_index import KeyframeIndex
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_VERSION = 1
+# Keeps the sheet well below JPEG's 65535 px limit for long recordings
+_MAX_TILES = 2000
+_JPEG_QUALITY = 70
+
+
+def plan_tile_times(
+    duration: float,
+    interval: float,
+    index: Optional[KeyframeIndex] = None
+) -> List[float]:
+    """
+    Pick the timestamps of the tiles
+
+    Args:
+        duration: Recording duration in seconds
+        interval: Desired seconds between tiles
+        index: Keyframe index; tiles are snapped to the keyframe before each step
+
+    Returns:
+        Ascending, de-duplicated tile timestamps
+    """
+    interval = max(interval, duration / _MAX_TILES, 0.1)
+    times: List[float] = []
+    step = 0
+    while step * interval < duration:
+        target = step * interval
+        t = index.keyframe_before(target) if index else target
+        if not times or t > times[-1]:
+            times.append(t)
+        step += 1
+    return times
+
+
+def build_sprite_sheet(
+    video_path: str,
+    image_path: str,
+    manifest_path: str,
+    duration: float,
+    interval: float = 10.0,
+    tile_width: int = 160,
+    columns: int = 10,
+    index: Optional[KeyframeIndex] = None
+) -> Optional[dict]:
+    """
+    Decode the tiles and write the sprite sheet and its manifest (blocking)
+
+    Returns:
+        The manifest or None if the video could not be read
+    """
+    times = plan_tile_times(duration, interval, index)
+    if not times:
+        return None
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+
+        width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+        height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        if not width or not height:
+            return None
+
+        tile_height = max(2, int(round(tile_width * height / width / 2)) * 2)
+        columns = max(1, min(columns, len(times)))
+        rows = (len(times) + columns - 1) // columns
+        sheet = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+
+        for i, t in enumerate(times):
+            # Seeking to a keyframe timestamp decodes just that frame
+            cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            row, column = divmod(i, columns)
+            sheet[
+                row * tile_height:(row + 1) * tile_height,
+                column * tile_width:(column + 1) * tile_width
+            ] = cv2.resize(frame, (tile_width, tile_height), interpolation=cv2.INTER_AREA)
+    finally:
+        cap.release()
+
+    ok, encoded = cv2.imencode(".jpg", sheet, [cv2.IMWRITE_JPEG_QUALITY, _JPEG_QUALITY])
+    if not ok:
+        return None
+
+    manifest = {
+        "version": _FORMAT_VERSION,
+        "image": os.path.basename(image_path),
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "columns": columns,
+        "rows": rows,
+        "interval": interval,
+        "times": [round(t, 3) for t in times]
+    }
+
+    _write_atomic(image_path, encoded.tobytes(), "wb")
+    _write_atomic(manifest_path, json.dumps(manifest, separators=(",", ":")), "w")
+    return manifest
+
+
+def _write_atomic(path: str, data, mode: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
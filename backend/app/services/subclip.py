@@ -0,0 +1,150 @@
+"""
+Subclip export planning
+
+Turns an export request into ffmpeg invocations for one of three modes:
+
+- fast:  stream copy from the keyframe at or before the start (no decoding)
+- exact: re-encode the whole clip (frame accurate, CPU heavy)
+- smart: re-encode only the partial GOPs at both edges and stream copy the
+         keyframe-aligned middle, then concatenate the pieces
+"""
+
+from typing import List, Literal, NamedTuple, Optional
+
+from app.services.keyframe_index import KeyframeIndex
+
+ExportMode = Literal["fast", "exact", "smart"]
+
+# Edge encoders per source codec (smart mode needs a matching codec to concat)
+_EDGE_ENCODERS = {
+    "h264": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18"],
+    "hevc": ["-c:v", "libx265", "-preset", "veryfast", "-crf", "20"],
+    "mpeg4": ["-c:v", "mpeg4", "-q:v", "2"]
+}
+_EXACT_ENCODER = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20"]
+_AUDIO_ENCODER = ["-c:a", "aac", "-b:a", "160k"]
+
+# Seeking a stream copy lands on the keyframe at or before the position, so
+# copy seeks are nudged past the keyframe to not round down to the previous one
+_COPY_SEEK_EPSILON = 0.001
+# Edge pieces shorter than this are dropped instead of encoded
+_MIN_EDGE = 0.02
+# Fragmented MP4 needs no seekable output: an empty moov is written first and
+# every fragment (at keyframes, at least every second) is self-contained
+_FRAGMENTED_MP4 = [
+    "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+    "-frag_duration", "1000000",
+    "-f", "mp4"
+]
+
+
+class Segment(NamedTuple):
+    """Part of an export: [start, end) of the source, copied or re-encoded"""
+    start: float
+    end: float
+    copy: bool
+
+
+def plan_segments(
+    mode: ExportMode,
+    start: float,
+    end: float,
+    index: Optional[KeyframeIndex] = None,
+    codec: Optional[str] = None
+) -> List[Segment]:
+    """
+    Split an export into copied and re-encoded segments
+
+    Args:
+        mode: Export mode
+        start: Requested start in seconds
+        end: Requested end in seconds
+        index: Keyframe index of the source (fast/smart degrade without it)
+        codec: Normalized source video codec (smart needs an edge encoder)
+
+    Returns:
+        Segments in playback order
+    """
+    if mode == "fast":
+        if index:
+            start = index.plan_cut(start, end).start
+        return [Segment(start, end, copy=True)]
+
+    if mode == "smart" and index and codec in _EDGE_ENCODERS:
+        first_keyframe = index.keyframe_after(start)
+        last_keyframe = index.keyframe_before(end)
+
+        if first_keyframe is not None and first_keyframe < last_keyframe:
+            segments = []
+            if first_keyframe - start > _MIN_EDGE:
+                segments.append(Segment(start, first_keyframe, copy=False))
+            segments.append(Segment(first_keyframe, last_keyframe, copy=True))
+            if end - last_keyframe > _MIN_EDGE:
+                segments.append(Segment(last_keyframe, end, copy=False))
+            return segments
+
+    # exact, or smart without a keyframe-aligned middle
+    return [Segment(start, end, copy=False)]
+
+
+def segment_command(
+    source: str,
+    segment: Segment,
+    output: str,
+    codec: Optional[str] = None,
+    container: Optional[str] = None
+) -> List[str]:
+    """
+    ffmpeg arguments that write one segment
+
+    Args:
+        source: Source video path
+        segment: Segment to write
+        output: Output path
+        codec: Source codec; re-encoded pieces of a smart export use a
+            matching encoder so they can be concatenated with copied ones
+        container: Force an output format (e.g. "mpegts" for concat pieces)
+    """
+    encoder = _EDGE_ENCODERS.get(codec, _EXACT_ENCODER) if container else _EXACT_ENCODER
+    cmd = _segment_args(source, segment, encoder)
+
+    if container:
+        cmd += ["-f", container]
+    else:
+        cmd += ["-movflags", "+faststart"]
+
+    return cmd + [output]
+
+
+def stream_command(source: str, segment: Segment) -> List[str]:
+    """ffmpeg arguments that write one segment as fragmented MP4 to stdout"""
+    return _segment_args(source, segment, _EXACT_ENCODER) + _FRAGMENTED_MP4 + ["pipe:1"]
+
+
+def _segment_args(source: str, segment: Segment, encoder: List[str]) -> List[str]:
+    """Input, seek, duration and codec arguments of a segment"""
+    seek = segment.start + _COPY_SEEK_EPSILON if segment.copy and segment.start > 0 else segment.start
+    cmd = [
+        "-ss", f"{seek:.3f}",
+        "-i", source,
+        "-t", f"{segment.end - segment.start:.3f}",
+        "-map", "0:v:0", "-map", "0:a?"
+    ]
+
+    if segment.copy:
+        cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+    else:
+        cmd += encoder + ["-pix_fmt", "yuv420p"] + _AUDIO_ENCODER
+
+    return cmd
+
+
+def concat_command(list_path: str, output: str) -> List[str]:
+    """ffmpeg arguments that join the pieces listed in a concat demuxer file"""
+    return [
+        "-f", "concat", "-safe", "0",
+        "-i", list_path,
+        "-map", "0", "-c", "copy",
+        "-movflags", "+faststart",
+        output
+    ]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: preview frame encoding, PIL round-trip vs. FramePipeline
+
+Measures per-frame latency and the memory allocated per frame (peak, via
+tracemalloc; numpy and cv2 output arrays are tracked) for the former
+cvtColor -> resize -> PIL -> BytesIO path and for FramePipeline.encode.
+
+Usage:
+    python benchmarks/frame_pipeline.py
+    python benchmarks/frame_pipeline.py --source 1920x1080 --target 800x450 --format webp
+
+The "before" column needs Pillow, which is no longer a backend dependency;
+it is skipped if Pillow is not installed.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+import cv2
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.frame_pipeline import FramePipeline, FrameSpec
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def parse_size(value: str):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def make_frame(width: int, height: int) -> np.ndarray:
+    """Synthetic BGR frame with some structure (pure noise compresses unrealistically)"""
+    x = np.linspace(0, 255, width, dtype=np.uint8)
+    frame = np.empty((height, width, 3), np.uint8)
+    frame[:] = x[None, :, None]
+    cv2.putText(frame, "CameraUI", (width // 10, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 4, (0, 0, 255), 8)
+    return frame
+
+
+def encode_pil(frame: np.ndarray, spec: FrameSpec) -> bytes:
+    """Encoding as previously done in FileService._extract_frame_base64 (without base64)"""
+    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame = cv2.resize(frame, (spec.width, spec.height))
+    img = Image.fromarray(frame, "RGB")
+    buff = BytesIO()
+    img.save(buff, format="JPEG" if spec.format == "jpeg" else "WEBP", quality=spec.quality)
+    return buff.getvalue()
+
+
+def measure(encode, frame: np.ndarray, spec: FrameSpec, iterations: int):
+    """Return (median ms, p95 ms, peak KiB allocated per frame, output bytes)"""
+    encode(frame, spec)  # warm-up (allocates reusable buffers)
+
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        encode(frame, spec)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    output = encode(frame, spec)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return statistics.median(latencies), p95, peak / 1024, len(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark preview frame encoding")
+    parser.add_argument("--source", type=parse_size, default=(1920, 1080))
+    parser.add_argument("--target", type=parse_size, default=(800, 450))
+    parser.add_argument("--quality", type=int, default=75)
+    parser.add_argument("--format", choices=["jpeg", "webp"], default="jpeg")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    frame = make_frame(*args.source)
+    spec = FrameSpec(args.target[0], args.target[1], args.quality, args.format)
+    pipeline = FramePipeline()
+
+    candidates = [("pipeline", pipeline.encode)]
+    if Image is not None:
+        candidates.insert(0, ("pil (before)", encode_pil))
+    else:
+        print("Pillow not installed, skipping the 'before' measurement")
+
+    print(f"source {args.source[0]}x{args.source[1]} -> {spec.width}x{spec.height} {spec.format} q{spec.quality}")
+    print(f"{'variant':<14} {'median':>9} {'p95':>9} {'alloc/frame':>12} {'bytes':>8}")
+    for name, encode in candidates:
+        median, p95, peak_kib, size = measure(encode, frame, spec, args.iterations)
+        print(f"{name:<14} {median:>7.2f}ms {p95:>7.2f}ms {peak_kib:>9.0f}KiB {size:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: container probe vs. cv2.VideoCapture for duration lookup
+
+Usage:
+    python benchmarks/media_probe.py path/to/recording.mp4 [more files...]
+    python benchmarks/media_probe.py            # generates a short sample clip
+
+Without arguments a 60 second 1280x720 sample is written to a temporary
+directory with cv2.VideoWriter (mp4v). Real OBS recordings show a much
+larger gap, because cv2 has to open the H.264 decoder as well.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.media_probe import probe_media
+
+
+def create_sample(directory: str, seconds: int = 60, fps: int = 25) -> str:
+    """Write a synthetic sample recording"""
+    path = os.path.join(directory, "sample.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (1280, 720))
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    for i in range(seconds * fps):
+        frame[:] = i % 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def cv2_duration(path: str):
+    """Duration lookup as previously done in FileService"""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    return frame_count / fps if fps > 0 else None
+
+
+def probe_duration(path: str):
+    info = probe_media(path)
+    return info.duration if info else None
+
+
+def measure(func, path: str, rounds: int):
+    """Return (result, median ms, p95 ms)"""
+    timings = []
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func(path)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return result, statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main(paths, rounds):
+    print(f"{'file':<30} {'method':<8} {'duration':>10} {'median':>10} {'p95':>10}")
+    for path in paths:
+        name = os.path.basename(path)[:30]
+        for label, func in (("probe", probe_duration), ("cv2", cv2_duration)):
+            result, median, p95 = measure(func, path, rounds)
+            duration = f"{result:.2f}s" if result else "-"
+            print(f"{name:<30} {label:<8} {duration:>10} {median:>8.3f}ms {p95:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the container probe against cv2")
+    parser.add_argument("paths", nargs="*", help="Video files to probe")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.paths:
+        main(args.paths, args.rounds)
+    else:
+        directory = tempfile.mkdtemp(prefix="probe-bench-")
+        try:
+            main([create_sample(directory)], args.rounds)
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FileService startup scan time vs. number of recordings
+
+Creates synthetic JSON sidecars (and optionally truncated .mp4 files for
+unfinished recordings) in a temporary directory and times scan_files()
+for several archive sizes and concurrency limits.
+
+Usage:
+    python benchmarks/scan_startup.py
+    python benchmarks/scan_startup.py --sizes 100 1000 10000 --concurrency 1 4 8
+"""
+
+import asyncio
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.video import VideoFile
+from app.services.file_service import FileService
+
+
+def create_archive(directory: str, count: int, unfinished_ratio: float):
+    """Create count sidecars; a fraction of them without end time"""
+    now = datetime.now(timezone.utc)
+    unfinished_every = int(1 / unfinished_ratio) if unfinished_ratio > 0 else 0
+
+    for i in range(count):
+        start = now - timedelta(hours=i)
+        video_file = VideoFile(filename=f"bench-{i:06d}", start_time=start)
+
+        if unfinished_every and i % unfinished_every == 0:
+            # Unreadable stub so the duration probe has to open a file
+            with open(os.path.join(directory, f"{video_file.filename}.mp4"), "wb") as f:
+                f.write(b"\0" * 4096)
+        else:
+            video_file.end_time = start + timedelta(hours=2)
+
+        video_file.to_json_file(directory)
+
+
+async def time_scan(directory: str, concurrency: int) -> float:
+    """Time a full scan of the directory"""
+    file_service = FileService(directory, scan_concurrency=concurrency)
+    started = time.perf_counter()
+    await file_service.scan_files()
+    return time.perf_counter() - started
+
+
+async def main(sizes, concurrencies, unfinished_ratio):
+    print(f"{'recordings':>10} {'concurrency':>11} {'seconds':>9} {'per file':>10}")
+
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix="scan-bench-")
+        try:
+            create_archive(directory, size, unfinished_ratio)
+            for concurrency in concurrencies:
+                elapsed = await time_scan(directory, concurrency)
+                print(f"{size:>10} {concurrency:>11} {elapsed:>9.3f} {elapsed / size * 1000:>8.3f}ms")
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the FileService startup scan")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument(
+        "--unfinished-ratio",
+        type=float,
+        default=0.01,
+        help="Fraction of recordings without end time (forces a duration probe)"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args.sizes, args.concurrency, args.unfinished_ratio))
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import logging
+import os
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
@@ -11,6 +12,13 @@ from app.core.config import settings as app_settings
 from app.services.recording_scheduler import RecordingScheduler
 from app.services.obs_service import OBSService
 from app.services.file_service import FileService
+from app.services.metadata_store import MetadataStore
+from app.services.decoder_pool import DecoderPool
+from app.services.frame_cache import FrameCache
+from app.services.ffmpeg_runner import FFmpegRunner
+from app.services.export_queue import ExportQueue
+from app.services.export_cache import ExportCache
+from app.services.preview_broadcaster import PreviewBroadcaster
 from app.services.audio_monitor import AudioMonitorService
 
 # Configure logging with local timezone for filename
@@ -34,7 +42,38 @@ async def lifespan(app: FastAPI):
     
     # Initialize services
     obs_service = OBSService()
-    file_service = FileService()
+    metadata_store = None
+    if app_settings.METADATA_BACKEND == "sqlite":
+        metadata_store = MetadataStore(app_settings.METADATA_DB_PATH)
+        # Open before the scheduler can save metadata; the catalog loads later
+        await metadata_store.open()
+    file_service = FileService(
+        app_settings.VIDEO_DIRECTORY,
+        metadata_store,
+        scan_concurrency=app_settings.SCAN_CONCURRENCY,
+        media_cache_size=app_settings.MEDIA_CACHE_SIZE,
+        decoder_pool=DecoderPool(
+            max_open=app_settings.DECODER_POOL_SIZE,
+            idle_timeout=app_settings.DECODER_IDLE_TIMEOUT,
+            forward_window=app_settings.DECODER_FORWARD_WINDOW
+        ),
+        keyframe_cache_size=app_settings.KEYFRAME_INDEX_CACHE_SIZE,
+        frame_cache=FrameCache(app_settings.FRAME_CACHE_MAX_BYTES),
+        frame_step=app_settings.FRAME_CACHE_STEP,
+        frame_prefetch=app_settings.FRAME_PREFETCH_NEIGHBORS,
+        sprite_interval=app_settings.SPRITE_INTERVAL,
+        sprite_tile_width=app_settings.SPRITE_TILE_WIDTH,
+        sprite_columns=app_settings.SPRITE_COLUMNS,
+        ffmpeg=FFmpegRunner(
+            app_settings.FFMPEG_BINARY,
+            timeout=app_settings.FFMPEG_TIMEOUT or None
+        ),
+        export_cache=ExportCache(
+            os.path.join(app_settings.VIDEO_DIRECTORY, "exports"),
+            max_bytes=app_settings.EXPORT_CACHE_MAX_BYTES,
+            max_age=app_settings.EXPORT_CACHE_MAX_AGE_SECONDS
+        )
+    )
     
     # Configure OBS service
     await obs_service.configure(
@@ -42,15 +81,36 @@ async def lifespan(app: FastAPI):
         port=app_settings.OBS_PORT,
         password=app_settings.OBS_PASSWORD,
         show_logo=app_settings.SHOW_LOGO,
-        max_reconnect_delay=app_settings.OBS_RECONNECT_MAX_DELAY
+        max_reconnect_delay=app_settings.OBS_RECONNECT_MAX_DELAY,
+        request_timeout=app_settings.OBS_REQUEST_TIMEOUT,
+        reconcile_interval=app_settings.OBS_RECONCILE_INTERVAL,
+        read_cache_ttl=app_settings.OBS_READ_CACHE_TTL
     )
 
-    # Initialize file service
-    await file_service.initialize(delete_age=app_settings.delete_age)
+    # Load the catalog and run retention cleanup in the background, so the
+    # recorder and health endpoints are available immediately
+    file_service.start(delete_age=app_settings.delete_age)
 
     # Create scheduler
     scheduler = RecordingScheduler(obs_service, file_service)
 
+    # Create export queue
+    export_queue = ExportQueue(
+        file_service,
+        obs_service,
+        concurrency=app_settings.EXPORT_CONCURRENCY,
+        pause_while_recording=app_settings.EXPORT_PAUSE_WHILE_RECORDING,
+        nice=app_settings.EXPORT_NICE,
+        history=app_settings.EXPORT_JOB_HISTORY
+    )
+
+    # Live preview is captured once and pushed to all viewers
+    preview_broadcaster = PreviewBroadcaster(
+        obs_service,
+        min_interval=app_settings.PREVIEW_MIN_INTERVAL,
+        max_interval=app_settings.PREVIEW_MAX_INTERVAL
+    )
+
     # Create audio monitor service
     audio_monitor = AudioMonitorService(obs_service, app_settings)
 
@@ -58,10 +118,13 @@ async def lifespan(app: FastAPI):
     app.state.obs_service = obs_service
     app.state.file_service = file_service
     app.state.scheduler = scheduler
+    app.state.export_queue = export_queue
+    app.state.preview_broadcaster = preview_broadcaster
     app.state.audio_monitor = audio_monitor
 
     # Start background tasks
     await scheduler.start()
+    export_queue.start()
     await audio_monitor.start()
     
     logger.info("ScheinCam Backend started successfully")
@@ -72,7 +135,12 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down ScheinCam Backend")
     await audio_monitor.stop()
     await scheduler.stop()
+    await export_queue.stop()
+    await preview_broadcaster.stop()
+    await file_service.stop()
     await obs_service.disconnect()
+    if metadata_store:
+        await metadata_store.close()
     logger.info("ScheinCam Backend shut down")
 
 
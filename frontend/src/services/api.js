@@ -36,6 +36,10 @@ export default {
     getPreview() {
       return api.get('/api/recordings/preview')
     },
+    getPreviewSocketUrl() {
+      const base = api.defaults.baseURL || window.location.origin
+      return `${base.replace(/^http/, 'ws')}/api/recordings/preview/ws`
+    },
     getNextScheduled() {
       return api.get('/api/recordings/next-scheduled')
     }
@@ -86,19 +90,40 @@ export default {
     getById(id) {
       return api.get(`/api/recordings/videos/${id}`)
     },
-    getFrame(id, timestamp) {
+    getFrameUrl(id, timestamp, seek = 'exact') {
+      const params = new URLSearchParams({ timestamp, seek })
+      return `${api.defaults.baseURL}/api/recordings/videos/${id}/frame.jpg?${params}`
+    },
+    getSprite(manifestUrl) {
+      return api.get(manifestUrl)
+    },
+    getFrame(id, timestamp, seek = 'exact') {
       return api.get(`/api/recordings/videos/${id}/frame`, {
-        params: { timestamp }
+        params: { timestamp, seek }
       })
     },
-    exportSubclip(id, startTime, endTime) {
+    exportSubclip(id, startTime, endTime, mode = 'fast') {
       return api.post(`/api/recordings/videos/${id}/export`, {
         start_time: startTime,
-        end_time: endTime
+        end_time: endTime,
+        mode
       })
     },
-    download(filename) {
-      return api.get(`/videos/${filename}`, {
+    getStreamExportUrl(id, startTime, endTime, mode = 'fast') {
+      const params = new URLSearchParams({ start_time: startTime, end_time: endTime, mode })
+      return `${api.defaults.baseURL}/api/recordings/videos/${id}/export.mp4?${params}`
+    },
+    getExportEventsUrl(jobId) {
+      return `${api.defaults.baseURL}/api/recordings/exports/${jobId}/events`
+    },
+    getExportJob(jobId) {
+      return api.get(`/api/recordings/exports/${jobId}`)
+    },
+    cancelExport(jobId) {
+      return api.delete(`/api/recordings/exports/${jobId}`)
+    },
+    download(url) {
+      return api.get(url, {
         responseType: 'blob'
       })
     },
@@ -7,9 +7,12 @@ export const useVideosStore = defineStore('videos', () => {
   const videos = ref([])
   const selectedVideo = ref(null)
   const previewFrame = ref(null)
+  const previewTimestamp = ref(null)
+  const sprite = ref(null)
   const exportedFile = ref(null)
   const loading = ref(false)
   const exporting = ref(false)
+  const exportJob = ref(null)
   const error = ref(null)
 
   // Computed
@@ -72,6 +75,7 @@ export const useVideosStore = defineStore('videos', () => {
       error.value = null
       const response = await api.videos.getById(videoId)
       selectedVideo.value = response.data
+      await loadSprite(response.data.sprite)
       return response.data
     } catch (err) {
       error.value = err.message
@@ -82,52 +86,143 @@ export const useVideosStore = defineStore('videos', () => {
     }
   }
 
-  async function fetchFrame(videoId, timestamp) {
+  async function loadSprite(manifestUrl) {
+    sprite.value = null
+    if (!manifestUrl) return
+
     try {
-      const response = await api.videos.getFrame(videoId, timestamp)
+      const response = await api.videos.getSprite(manifestUrl)
+      const base = manifestUrl.substring(0, manifestUrl.lastIndexOf('/') + 1)
+      const imageUrl = base + response.data.image
 
-      if (response.data.success && response.data.frame) {
-        previewFrame.value = response.data.frame
-      }
+      // Load the sheet once; every scrub preview is then a crop of it
+      await new Promise((resolve, reject) => {
+        const img = new Image()
+        img.onload = resolve
+        img.onerror = reject
+        img.src = imageUrl
+      })
+      sprite.value = { ...response.data, imageUrl }
+    } catch (err) {
+      // No sprite sheet: scrubbing falls back to keyframe previews
+      console.warn('Sprite sheet not available:', err)
+    }
+  }
 
-      return response.data
+  async function fetchFrame(videoId, timestamp, seek = 'exact') {
+    try {
+      // Plain JPEG URL: cacheable by the browser and the nginx proxy
+      const url = api.videos.getFrameUrl(videoId, timestamp, seek)
+
+      // Preload so the preview only switches once the frame has arrived
+      await new Promise((resolve, reject) => {
+        const img = new Image()
+        img.onload = resolve
+        img.onerror = () => reject(new Error('Could not load frame'))
+        img.src = url
+      })
+      previewFrame.value = url
+      previewTimestamp.value = timestamp
+
+      return { success: true, frame: url, timestamp }
     } catch (err) {
       console.error('Failed to fetch frame:', err)
       throw err
     }
   }
 
-  async function exportSubclip(videoId, startTime, endTime) {
+  const EXPORT_POLL_INTERVAL = 1000
+  const EXPORT_FINAL_STATES = ['finished', 'failed', 'cancelled']
+
+  // Resolves with the final job state, or with the last known state if the
+  // event stream is unavailable (the caller then falls back to polling)
+  function followExportEvents(job) {
+    if (typeof EventSource === 'undefined') return Promise.resolve(job)
+
+    return new Promise(resolve => {
+      const source = new EventSource(api.videos.getExportEventsUrl(job.id))
+      let current = job
+
+      const onEvent = event => {
+        current = JSON.parse(event.data)
+        exportJob.value = current
+        if (EXPORT_FINAL_STATES.includes(current.state)) {
+          source.close()
+          resolve(current)
+        }
+      }
+      for (const name of ['queued', 'started', 'progress', ...EXPORT_FINAL_STATES]) {
+        source.addEventListener(name, onEvent)
+      }
+      source.onerror = () => {
+        source.close()
+        resolve(current)
+      }
+    })
+  }
+
+  async function pollExportJob(job) {
+    while (!EXPORT_FINAL_STATES.includes(job.state)) {
+      await new Promise(resolve => setTimeout(resolve, EXPORT_POLL_INTERVAL))
+      job = (await api.videos.getExportJob(job.id)).data
+      exportJob.value = job
+    }
+    return job
+  }
+
+  async function exportSubclip(videoId, startTime, endTime, mode = 'fast') {
     try {
       exporting.value = true
       error.value = null
 
-      const response = await api.videos.exportSubclip(videoId, startTime, endTime)
+      // The export is queued on the server; follow the job until it is done
+      const response = await api.videos.exportSubclip(videoId, startTime, endTime, mode)
+      exportJob.value = response.data.job
 
-      if (response.data.success) {
-        exportedFile.value = response.data.file
+      let job = await followExportEvents(response.data.job)
+      job = await pollExportJob(job)
+
+      if (job.state === 'finished') {
+        exportedFile.value = job.file
+      } else if (job.state === 'failed') {
+        throw new Error(job.error || 'Export fehlgeschlagen')
       }
 
-      return response.data
+      return job
     } catch (err) {
       error.value = err.message
       console.error('Failed to export subclip:', err)
       throw err
     } finally {
       exporting.value = false
+      exportJob.value = null
     }
   }
 
-  async function downloadVideo(filename) {
+  async function cancelExport() {
+    if (!exportJob.value) return
+    try {
+      await api.videos.cancelExport(exportJob.value.id)
+    } catch (err) {
+      console.error('Failed to cancel export:', err)
+    }
+  }
+
+  // Direct download: the server streams the clip without queueing or storing it
+  function streamExportUrl(videoId, startTime, endTime, mode = 'fast') {
+    return api.videos.getStreamExportUrl(videoId, startTime, endTime, mode)
+  }
+
+  async function downloadVideo(file) {
     try {
-      const response = await api.videos.download(filename)
+      const response = await api.videos.download(file.url)
 
       // Create blob and trigger download
       const blob = new Blob([response.data])
       const url = window.URL.createObjectURL(blob)
       const link = document.createElement('a')
       link.href = url
-      link.download = filename
+      link.download = file.filename
       document.body.appendChild(link)
       link.click()
       document.body.removeChild(link)
@@ -169,9 +264,12 @@ export const useVideosStore = defineStore('videos', () => {
     videos,
     selectedVideo,
     previewFrame,
+    previewTimestamp,
+    sprite,
     exportedFile,
     loading,
     exporting,
+    exportJob,
     error,
     // Computed
     videosList,
@@ -180,6 +278,8 @@ export const useVideosStore = defineStore('videos', () => {
     selectVideo,
     fetchFrame,
     exportSubclip,
+    cancelExport,
+    streamExportUrl,
     downloadVideo,
     deleteVideo,
     clearExportedFile,